@@ -1,35 +1,100 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
-from funsor.domains import Domain, bint, find_domain, reals
-from funsor.integrate import Integrate
-from funsor.interpreter import reinterpret
-from funsor.sum_product import MarkovProduct
-from funsor.terms import Cat, Funsor, Independent, Lambda, Number, Slice, Stack, Variable, of_shape, to_data, to_funsor
-from funsor.tensor import Tensor, function
+import importlib
+import sys
+
+from funsor.registry import defer_import
 from funsor.util import set_backend, get_backend, pretty, quote
 
-from . import (
-    adjoint,
-    affine,
-    cnf,
-    delta,
-    distribution,
-    domains,
-    einsum,
-    gaussian,
-    integrate,
-    interpreter,
-    joint,
-    memoize,
-    # minipyro,  # TODO: enable when minipyro is backend-agnostic
-    montecarlo,
-    ops,
-    sum_product,
-    terms,
-    testing,
+# Submodules and attributes are imported lazily on first access, see __getattr__ below.
+_SUBMODULES = (
+    'adjoint',
+    'affine',
+    'chunked',
+    'cnf',
+    'compiler',
+    'delta',
+    'distribution',
+    'domains',
+    'einsum',
+    'gaussian',
+    'integrate',
+    'interpreter',
+    'joint',
+    'memoize',
+    # 'minipyro',  # TODO: enable when minipyro is backend-agnostic
+    'montecarlo',
+    'ops',
+    'optimizer',
+    'profiler',
+    'registry',
+    'sum_product',
+    'terms',
+    'testing',
+    'util',
+)
+_ATTRIBUTES = {
+    'Cat': 'funsor.terms',
+    'Domain': 'funsor.domains',
+    'Funsor': 'funsor.terms',
+    'Independent': 'funsor.terms',
+    'Integrate': 'funsor.integrate',
+    'Lambda': 'funsor.terms',
+    'MarkovProduct': 'funsor.sum_product',
+    'Number': 'funsor.terms',
+    'Slice': 'funsor.terms',
+    'Stack': 'funsor.terms',
+    'Tensor': 'funsor.tensor',
+    'Variable': 'funsor.terms',
+    'bint': 'funsor.domains',
+    'find_domain': 'funsor.domains',
+    'function': 'funsor.tensor',
+    'of_shape': 'funsor.terms',
+    'reals': 'funsor.domains',
+    'reinterpret': 'funsor.interpreter',
+    'to_data': 'funsor.terms',
+    'to_funsor': 'funsor.terms',
+}
+
+# Modules that register patterns are imported before the first dispatch.
+defer_import(
+    'funsor.adjoint',
+    'funsor.affine',
+    'funsor.cnf',
+    'funsor.delta',
+    'funsor.distribution',
+    'funsor.einsum',
+    'funsor.gaussian',
+    'funsor.integrate',
+    'funsor.joint',
+    'funsor.montecarlo',
+    'funsor.sum_product',
+    'funsor.tensor',
+    'funsor.testing',
 )
 
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        value = importlib.import_module('funsor.' + name)
+    elif name in _ATTRIBUTES:
+        value = getattr(importlib.import_module(_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError("module 'funsor' has no attribute '{}'".format(name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+# Module __getattr__ requires Python 3.7 (PEP 562).
+if sys.version_info < (3, 7):
+    for _name in _SUBMODULES + tuple(_ATTRIBUTES):
+        __getattr__(_name)
+
 # TODO: move to `funsor.util` when the following circular import issue is resolved
 # funsor.domains -> funsor.util -> set_backend -> funsor.torch -> funsor.domains
 set_backend(get_backend())
@@ -52,7 +117,9 @@ __all__ = [
     'affine',
     'backward',
     'bint',
+    'chunked',
     'cnf',
+    'compiler',
     'delta',
     'distribution',
     'domains',
@@ -70,6 +137,7 @@ __all__ = [
     'of_shape',
     'ops',
     'pretty',
+    'profiler',
     'quote',
     'reals',
     'reinterpret',
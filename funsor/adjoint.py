@@ -43,7 +43,7 @@ class AdjointTape(object):
 
     def __enter__(self):
         self.tape = []
-        self._old_interpretation = interpreter._INTERPRETATION
+        self._old_interpretation = interpreter.get_interpretation()
         interpreter.set_interpretation(self)
         return self
 
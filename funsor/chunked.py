@@ -0,0 +1,132 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+import contextvars
+from contextlib import contextmanager
+from multipledispatch.variadic import Variadic
+
+from funsor.cnf import Contraction
+from funsor.interpreter import dispatch_chain, dispatched_interpretation, interpretation
+from funsor.ops import AssociativeOp, NullOp
+from funsor.tensor import Tensor
+from funsor.terms import Cat, Slice, eager
+
+
+@dispatched_interpretation
+def chunked(cls, *args):
+    """
+    A memory-bounded interpretation of :class:`~funsor.cnf.Contraction` s of
+    :class:`~funsor.tensor.Tensor` s. Contractions whose broadcast terms would
+    exceed the current memory budget are split along one of their inputs and
+    evaluated one slice at a time, preferring reduced inputs, whose slices are
+    folded into a running result by the reduction op, over free inputs, whose
+    slices are combined by :class:`~funsor.terms.Cat` . This falls back to
+    :class:`~funsor.terms.eager` in other cases.
+
+    Only the broadcast intermediates are bounded by the budget: the result of
+    each contraction, which is a running reduction or a concatenation of
+    slices, must itself fit in memory.
+
+    To bound the memory of a large sum-product computation, first build it
+    lazily and optimize it, then evaluate it under
+    :func:`chunked_interpretation`::
+
+        with interpretation(lazy):
+            expr = sum_product(ops.logaddexp, ops.add, factors, eliminate, plates)
+        expr = apply_optimizer(expr)
+        with chunked_interpretation(max_bytes=2 ** 30):
+            result = reinterpret(expr)
+    """
+    result = _chunked_dispatch(cls, *args)
+    if result is None:
+        result = eager(cls, *args)
+    return result
+
+
+_chunked_dispatch = dispatch_chain(chunked)
+
+
+# This is a context-local parameter bounding the memory of each contraction.
+_MAX_BYTES = contextvars.ContextVar("funsor_chunked_max_bytes", default=None)
+
+
+@contextmanager
+def chunked_interpretation(max_bytes):
+    """
+    Context manager to set the memory budget of the current thread or
+    :mod:`asyncio` task and install the :func:`chunked` interpretation.
+
+    :param int max_bytes: The maximum size in bytes of the broadcast terms of
+        each contraction. This does not bound the size of results.
+    """
+    assert isinstance(max_bytes, int) and max_bytes > 0
+    token = _MAX_BYTES.set(max_bytes)
+    try:
+        with interpretation(chunked):
+            yield
+    finally:
+        _MAX_BYTES.reset(token)
+
+
+def _itemsize(data):
+    itemsize = getattr(data, "itemsize", None)
+    if itemsize is None:
+        itemsize = data.element_size()  # older versions of torch
+    return itemsize
+
+
+@chunked.register(Contraction, AssociativeOp, AssociativeOp, frozenset, Variadic[Tensor])
+def chunked_contraction_variadic(red_op, bin_op, reduced_vars, *terms):
+    return chunked_contraction(red_op, bin_op, reduced_vars, terms)
+
+
+@chunked.register(Contraction, AssociativeOp, AssociativeOp, frozenset, tuple)
+def chunked_contraction(red_op, bin_op, reduced_vars, terms):
+    max_bytes = _MAX_BYTES.get()
+    if max_bytes is None or len(terms) < 2 or not all(isinstance(term, Tensor) for term in terms):
+        return None
+
+    # Estimate the size of the terms broadcast against each other.
+    sizes = {}
+    for term in terms:
+        sizes.update((k, d.size) for k, d in term.inputs.items())
+    numel = max(term.output.num_elements for term in terms)
+    for size in sizes.values():
+        numel *= size
+    nbytes = numel * max(_itemsize(term.data) for term in terms)
+    if nbytes <= max_bytes:
+        return None
+
+    # Split along the largest reduced input, or else the largest free input.
+    candidates = [k for k in sorted(sizes) if sizes[k] > 1]
+    if not candidates:
+        return None
+    reduced = [k for k in candidates if k in reduced_vars]
+    name = max(reduced or candidates, key=sizes.__getitem__)
+    size = sizes[name]
+    chunk_size = max(1, size * max_bytes // nbytes)
+
+    assert name not in reduced_vars or not isinstance(red_op, NullOp)
+    result = None
+    parts = []
+    for start in range(0, size, chunk_size):
+        subs = {name: Slice(name, start, start + chunk_size, 1, size)}
+        part_terms = tuple(term(**subs) if name in term.inputs else term for term in terms)
+        part = Contraction(red_op, bin_op, reduced_vars, *part_terms)
+        if name not in reduced_vars:
+            parts.append(part)
+        elif result is None:
+            result = part
+        else:
+            # Fold each part in as soon as it is computed, so at most two
+            # reduced results are alive at once.
+            result = red_op(result, part)
+    if name in reduced_vars:
+        return result
+    return Cat(name, tuple(parts))
+
+
+__all__ = [
+    'chunked',
+    'chunked_interpretation',
+]
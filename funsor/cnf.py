@@ -14,8 +14,8 @@ import funsor.ops as ops
 from funsor.affine import affine_inputs
 from funsor.delta import Delta
 from funsor.domains import find_domain
-from funsor.gaussian import Gaussian
-from funsor.interpreter import interpretation, recursion_reinterpret
+from funsor.gaussian import Gaussian, gaussian_tensordot
+from funsor.interpreter import children, interpretation, is_pruned, recursion_reinterpret
 from funsor.ops import DISTRIBUTIVE_OPS, AssociativeOp, NullOp, nullop
 from funsor.tensor import Tensor
 from funsor.terms import (
@@ -44,6 +44,8 @@ class Contraction(Funsor):
 
         Delta, Number, Tensor, Gaussian
     """
+    __slots__ = ("red_op", "bin_op", "terms", "reduced_vars")
+
     def __init__(self, red_op, bin_op, reduced_vars, terms):
         terms = (terms,) if isinstance(terms, Funsor) else terms
         assert isinstance(red_op, AssociativeOp)
@@ -171,9 +173,16 @@ def _(arg, indent, out):
 
 @recursion_reinterpret.register(Contraction)
 def recursion_reinterpret_contraction(x):
+    if is_pruned(x):
+        return x
     return type(x)(*map(recursion_reinterpret, (x.red_op, x.bin_op, x.reduced_vars) + x.terms))
 
 
+@children.register(Contraction)
+def children_contraction(x):
+    return (x.red_op, x.bin_op, x.reduced_vars) + x.terms
+
+
 @eager.register(Contraction, AssociativeOp, AssociativeOp, frozenset, Variadic[Funsor])
 def eager_contraction_generic_to_tuple(red_op, bin_op, reduced_vars, *terms):
     return eager(Contraction, red_op, bin_op, reduced_vars, terms)
@@ -181,6 +190,12 @@ def eager_contraction_generic_to_tuple(red_op, bin_op, reduced_vars, *terms):
 
 @eager.register(Contraction, AssociativeOp, AssociativeOp, frozenset, tuple)
 def eager_contraction_generic_recursive(red_op, bin_op, reduced_vars, terms):
+    # contract many tensors at once via a single einsum
+    if len(terms) > 2 and all(isinstance(v, Tensor) for v in terms):
+        result = _eager_contract_tensor_terms(red_op, bin_op, reduced_vars, terms)
+        if result is not None:
+            return result
+
     # push down leaf reductions
     terms, reduced_vars, leaf_reduced = list(terms), frozenset(reduced_vars), False
     for i, v in enumerate(terms):
@@ -239,23 +254,37 @@ def eager_contraction_to_binary(red_op, bin_op, reduced_vars, lhs, rhs):
 
 
 @eager.register(Contraction, ops.AddOp, ops.MulOp, frozenset, Tensor, Tensor)
+@eager.register(Contraction, ops.LogAddExpOp, ops.AddOp, frozenset, Tensor, Tensor)
 def eager_contraction_tensor(red_op, bin_op, reduced_vars, *terms):
-    if not all(term.dtype == "real" for term in terms):
+    result = _eager_contract_tensor_terms(red_op, bin_op, reduced_vars, terms)
+    if result is None:
         raise NotImplementedError('TODO')
-    backend = BACKEND_TO_EINSUM_BACKEND[get_backend()]
-    return _eager_contract_tensors(reduced_vars, terms, backend=backend)
+    return result
 
 
-@eager.register(Contraction, ops.LogAddExpOp, ops.AddOp, frozenset, Tensor, Tensor)
-def eager_contraction_tensor(red_op, bin_op, reduced_vars, *terms):
+def _eager_contract_tensor_terms(red_op, bin_op, reduced_vars, terms):
     if not all(term.dtype == "real" for term in terms):
-        raise NotImplementedError('TODO')
-    backend = BACKEND_TO_LOGSUMEXP_BACKEND[get_backend()]
+        return None
+    if isinstance(red_op, ops.AddOp) and isinstance(bin_op, ops.MulOp):
+        backend = BACKEND_TO_EINSUM_BACKEND[get_backend()]
+    elif isinstance(red_op, ops.LogAddExpOp) and isinstance(bin_op, ops.AddOp):
+        backend = BACKEND_TO_LOGSUMEXP_BACKEND[get_backend()]
+    else:
+        return None
     return _eager_contract_tensors(reduced_vars, terms, backend=backend)
 
 
-# TODO Consider using this for more than binary contractions.
+@functools.lru_cache(maxsize=1024)
+def _contract_expression(equation, *shapes):
+    return opt_einsum.contract_expression(equation, *shapes)
+
+
 def _eager_contract_tensors(reduced_vars, terms, backend):
+    """
+    Contracts any number of real :class:`~funsor.tensor.Tensor` s in a single
+    einsum. The contraction path is computed once per equation and operand
+    shapes and reused on subsequent calls.
+    """
     iter_symbols = map(opt_einsum.get_symbol, itertools.count())
     symbols = defaultdict(functools.partial(next, iter_symbols))
 
@@ -285,17 +314,38 @@ def _eager_contract_tensors(reduced_vars, terms, backend):
                              for dim in range(-len(event_shape), 0)
                              if dim in symbols))
     equation = ",".join(einsum_inputs) + "->" + einsum_output
-    data = opt_einsum.contract(equation, *operands, backend=backend)
+    expr = _contract_expression(equation, *(tuple(x.shape) for x in operands))
+    data = expr(*operands, backend=backend)
     data = data.reshape(batch_shape + event_shape)
     return Tensor(data, inputs)
 
 
-# TODO(https://github.com/pyro-ppl/funsor/issues/238) Use a port of
-# Pyro's gaussian_tensordot() here. Until then we must eagerly add the
-# possibly-rank-deficient terms before reducing to avoid Cholesky errors.
+def _split_gaussian_mixture(x):
+    if isinstance(x, Gaussian):
+        return Number(0.), x
+    if x.reduced_vars:
+        return None
+    return x.terms
+
+
 @eager.register(Contraction, ops.LogAddExpOp, ops.AddOp, frozenset,
-                GaussianMixture, GaussianMixture)
+                (Gaussian, GaussianMixture), (Gaussian, GaussianMixture))
 def eager_contraction_gaussian(red_op, bin_op, reduced_vars, x, y):
+    # When the reduced reals are exactly the reals shared by x and y, we can
+    # eliminate them blockwise via gaussian_tensordot(). Otherwise we must
+    # eagerly add the possibly-rank-deficient terms before reducing to avoid
+    # Cholesky errors.
+    x_split = _split_gaussian_mixture(x)
+    y_split = _split_gaussian_mixture(y)
+    if x_split is not None and y_split is not None:
+        (x_tensor, x_gaussian), (y_tensor, y_gaussian) = x_split, y_split
+        x_reals = frozenset(k for k, d in x_gaussian.inputs.items() if d.dtype == "real")
+        y_reals = frozenset(k for k, d in y_gaussian.inputs.items() if d.dtype == "real")
+        reduced_reals = reduced_vars & (x_reals | y_reals)
+        if reduced_reals and reduced_reals == x_reals & y_reals:
+            result = x_tensor + y_tensor + gaussian_tensordot(x_gaussian, y_gaussian, reduced_reals)
+            return result.reduce(red_op, reduced_vars - reduced_reals)
+
     return (x + y).reduce(red_op, reduced_vars)
 
 
@@ -433,7 +483,8 @@ def distribute_subs_contraction(arg, subs):
 def normalize_fuse_subs(arg, subs):
     # a(b)(c) -> a(b(c), c)
     arg_subs = tuple(arg.subs.items()) if isinstance(arg.subs, OrderedDict) else arg.subs
-    new_subs = subs + tuple((k, Subs(v, subs)) for k, v in arg_subs)
+    new_subs = subs + tuple((k, Subs(v, subs) if any(name in v.inputs for name, sub in subs) else v)
+                            for k, v in arg_subs)
     return Subs(arg.arg, new_subs)
 
 
@@ -0,0 +1,358 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+import operator
+
+import numpy as np
+
+import funsor.interpreter as interpreter
+from funsor.tensor import Tensor
+from funsor.terms import Funsor, Number, eager
+from funsor.util import get_backend
+
+# Functions that mutate their array arguments. These are never dropped by
+# dead code elimination.
+_MUTATING_FUNCTIONS = frozenset([
+    np.copyto,
+    np.fill_diagonal,
+    np.place,
+    np.put,
+    np.put_along_axis,
+    np.putmask,
+])
+_MUTATING_METHODS = frozenset(["__setitem__", "fill", "itemset", "partition", "put", "sort"])
+
+# ndarray methods that do not dispatch through __array_ufunc__ or
+# __array_function__ and are therefore recorded explicitly.
+_TRACED_METHODS = (
+    "__getitem__", "__setitem__", "argmax", "argmin", "argpartition", "argsort", "astype", "choose",
+    "compress", "conj", "copy", "cumprod", "cumsum", "diagonal", "dot", "fill", "flatten", "nonzero",
+    "partition", "put", "ravel", "repeat", "reshape", "searchsorted", "sort", "squeeze", "swapaxes",
+    "take", "trace", "transpose",
+)
+
+
+class _Slot(object):
+    """
+    Placeholder for the value of a traced array in a recorded program.
+    """
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+
+class _Instruction(object):
+    __slots__ = ("fn", "args", "kwargs", "out", "mutating")
+
+    def __init__(self, fn, args, kwargs, out, mutating):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.out = out
+        self.mutating = mutating
+
+
+class _Trace(object):
+    """
+    A straight-line program recorded from operations on :class:`_Tracer` s.
+    """
+    def __init__(self):
+        self.num_slots = 0
+        self.instructions = []
+
+    def new_tracer(self, value):
+        tracer = np.asarray(value).view(_Tracer)
+        tracer._trace = self
+        tracer._slot = self.num_slots
+        self.num_slots += 1
+        return tracer
+
+    def record(self, fn, args, kwargs, mutating=False):
+        plain_args = _map_tracers(args, _untrace)
+        plain_kwargs = _map_tracers(kwargs, _untrace)
+        result = fn(*plain_args, **plain_kwargs)
+        if type(result) in (bool, int, float, complex) and _any_tracer((args, kwargs)):
+            raise ValueError("Cannot compile {}, which returns a Python {} computed from traced data"
+                             .format(getattr(fn, "__name__", fn), type(result).__name__))
+        result = _map_arrays(result, self.new_tracer)
+        self.instructions.append(_Instruction(fn, _map_tracers(args, _to_slot), _map_tracers(kwargs, _to_slot),
+                                              _map_tracers(result, _to_slot), mutating))
+        return result
+
+
+def _untrace(x):
+    if x._slot is None:
+        raise ValueError("Cannot compile an operation on an untraced array, "
+                         "e.g. one created by np.asarray() or ndarray.view()")
+    return x.view(np.ndarray)
+
+
+def _to_slot(x):
+    return _Slot(x._slot)
+
+
+def _map_tracers(x, fn):
+    if isinstance(x, _Tracer):
+        return fn(x)
+    if type(x) in (tuple, list):
+        return type(x)(_map_tracers(v, fn) for v in x)
+    if type(x) is dict:
+        return {k: _map_tracers(v, fn) for k, v in x.items()}
+    return x
+
+
+def _map_arrays(x, fn):
+    if isinstance(x, (np.ndarray, np.generic)):
+        return fn(x)
+    if type(x) in (tuple, list):
+        return type(x)(_map_arrays(v, fn) for v in x)
+    return x
+
+
+def _any_tracer(x):
+    if isinstance(x, _Tracer):
+        return True
+    if type(x) in (tuple, list):
+        return any(map(_any_tracer, x))
+    if type(x) is dict:
+        return any(map(_any_tracer, x.values()))
+    return False
+
+
+def _raise_value_dependent(self, *args, **kwargs):
+    raise ValueError("Cannot compile control flow that depends on the values of traced data")
+
+
+def _traced_method(name):
+    fn = getattr(np.ndarray, name)
+    mutating = name in _MUTATING_METHODS
+
+    def method(self, *args, **kwargs):
+        return self._trace.record(fn, (self,) + args, kwargs, mutating)
+
+    method.__name__ = name
+    return method
+
+
+class _Tracer(np.ndarray):
+    """
+    An ndarray that records operations into a :class:`_Trace` . Arrays
+    derived from a tracer by untraced operations have no slot, and raise
+    an error when used by traced operations.
+    """
+    def __array_finalize__(self, obj):
+        self._trace = getattr(obj, "_trace", None)
+        self._slot = None
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        mutating = "out" in kwargs
+        return self._trace.record(getattr(ufunc, method), inputs, kwargs, mutating)
+
+    def __array_function__(self, func, types, args, kwargs):
+        return self._trace.record(func, args, kwargs, func in _MUTATING_FUNCTIONS)
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    __bool__ = __float__ = __int__ = __index__ = __complex__ = _raise_value_dependent
+    item = tolist = tobytes = _raise_value_dependent
+
+
+for _name in _TRACED_METHODS:
+    setattr(_Tracer, _name, _traced_method(_name))
+
+
+def _compile_template(x):
+    """
+    Compiles a template of args with :class:`_Slot` s into a function that
+    looks up slot values in an environment list.
+    """
+    if isinstance(x, _Slot):
+        return operator.itemgetter(x.index)
+    if type(x) in (tuple, list, dict):
+        items = list(x.items()) if type(x) is dict else list(enumerate(x))
+        getters = [(k, _compile_template(v)) for k, v in items]
+        if all(getter is None for k, getter in getters):
+            return None
+        if type(x) is dict:
+            return lambda env: {k: x[k] if getter is None else getter(env) for k, getter in getters}
+        return lambda env: type(x)(x[i] if getter is None else getter(env) for i, getter in getters)
+    return None
+
+
+def _slots(x):
+    if isinstance(x, _Slot):
+        yield x.index
+    elif type(x) in (tuple, list):
+        for v in x:
+            yield from _slots(v)
+    elif type(x) is dict:
+        for v in x.values():
+            yield from _slots(v)
+
+
+def _store(template, value, env):
+    if isinstance(template, _Slot):
+        env[template.index] = value
+    elif type(template) in (tuple, list):
+        for t, v in zip(template, value):
+            _store(t, v, env)
+
+
+def _collect_leaves(expr):
+    """
+    Returns the distinct :class:`~funsor.tensor.Tensor` s in an expression,
+    in depth-first order.
+    """
+    leaves = []
+    seen = set()
+    stack = [expr]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, (tuple, frozenset)):
+            stack.extend(reversed(tuple(x)))
+        elif isinstance(x, Funsor) and id(x) not in seen:
+            seen.add(id(x))
+            if isinstance(x, Tensor):
+                leaves.append(x)
+            else:
+                stack.extend(reversed(x._ast_values))
+    return leaves
+
+
+class CompiledFunsor(object):
+    """
+    A straight-line program of backend ops, recorded by :func:`compile_funsor`
+    from one eager evaluation of a lazy expression. Calling it replays only
+    the recorded ops, on new data for the leaf
+    :class:`~funsor.tensor.Tensor` s of the expression.
+
+    :ivar list leaves: The leaf :class:`~funsor.tensor.Tensor` s of the
+        traced expression, in the order expected by :meth:`__call__` .
+    :ivar int num_ops: The number of recorded ops, after dead code
+        elimination.
+    """
+    def __init__(self, leaves, trace, output):
+        self.leaves = leaves
+        self._num_slots = trace.num_slots
+        if isinstance(output, Tensor):
+            output_data = _map_tracers(output.data, _to_slot)
+            self._get_output = _compile_template(output_data) or (lambda env, data=output_data: data)
+            output = output.inputs, output.dtype
+        self._output = output
+
+        # Eliminate dead code, keeping all mutating ops.
+        live = set(_slots(output_data)) if isinstance(output, tuple) else set()
+        program = []
+        for inst in reversed(trace.instructions):
+            if inst.mutating or not live.isdisjoint(_slots(inst.out)):
+                live.update(_slots((inst.args, inst.kwargs)))
+                program.append(inst)
+        program.reverse()
+        self.num_ops = len(program)
+
+        self._program = []
+        for inst in program:
+            args = _compile_template(inst.args) or (lambda env, args=inst.args: args)
+            kwargs = _compile_template(inst.kwargs) or (lambda env, kwargs=inst.kwargs: kwargs)
+            out = inst.out if not isinstance(inst.out, _Slot) else inst.out.index
+            self._program.append((inst.fn, args, kwargs, out))
+
+    def __call__(self, *data):
+        """
+        Evaluates the compiled expression on new leaf data.
+
+        :param data: One numeric array (or :class:`~funsor.tensor.Tensor` )
+            per leaf in :attr:`leaves` , each with the same shape as the data
+            of the corresponding leaf.
+        :return: The value of the expression.
+        :rtype: ~funsor.tensor.Tensor
+        """
+        if len(data) != len(self.leaves):
+            raise ValueError("Expected {} leaf arrays, but got {}".format(len(self.leaves), len(data)))
+        env = [None] * self._num_slots
+        for i, (x, leaf) in enumerate(zip(data, self.leaves)):
+            if isinstance(x, Tensor):
+                x = x.data
+            if np.shape(x) != leaf.data.shape:
+                raise ValueError("Expected leaf {} to have shape {}, but got {}"
+                                 .format(i, leaf.data.shape, np.shape(x)))
+            env[i] = x
+        for fn, args, kwargs, out in self._program:
+            # Full reductions return numpy scalars, which were traced as 0-dim arrays.
+            result = _map_arrays(fn(*args(env), **kwargs(env)), np.asarray)
+            if type(out) is int:
+                env[out] = result
+            else:
+                _store(out, result, env)
+        if not isinstance(self._output, tuple):
+            return self._output
+        inputs, dtype = self._output
+        return Tensor(self._get_output(env), inputs, dtype)
+
+    def __repr__(self):
+        return "CompiledFunsor(leaves={}, num_ops={})".format(len(self.leaves), self.num_ops)
+
+
+def compile_funsor(expr):
+    """
+    Traces one eager evaluation of a lazy expression into a
+    :class:`CompiledFunsor` , a straight-line program of backend ops with
+    placeholders for the data of the leaf :class:`~funsor.tensor.Tensor` s of
+    the expression. Repeated evaluations with new data then avoid pattern
+    dispatch, normalization and alpha conversion, e.g.::
+
+        with interpretation(lazy):
+            expr = (x * y).reduce(ops.add, "i")
+        compiled = compile_funsor(expr)
+        assert compiled.leaves == [x, y]
+        result = compiled(new_x_data, new_y_data)
+
+    Only the data of leaf tensors may change between calls; their shapes,
+    as well as all other constants in the expression, are fixed when
+    tracing. The expression must be deterministic, and may not branch on the
+    values of its data. This is currently only supported by the numpy
+    backend. For other backends consider ``torch.jit`` or ``jax.jit`` .
+
+    :param ~funsor.terms.Funsor expr: A lazy expression that evaluates to a
+        :class:`~funsor.tensor.Tensor` or :class:`~funsor.terms.Number` under
+        the :func:`~funsor.terms.eager` interpretation.
+    :rtype: CompiledFunsor
+    :raises: NotImplementedError, ValueError
+    """
+    if get_backend() != "numpy":
+        raise NotImplementedError("compile_funsor() only supports the numpy backend")
+    assert isinstance(expr, Funsor)
+
+    leaves = _collect_leaves(expr)
+    trace = _Trace()
+    tracers = {}
+    for leaf in leaves:
+        key = (id(leaf.data), tuple(leaf.inputs.items()), leaf.dtype)
+        tracers[key] = trace.new_tracer(leaf.data)
+
+    def tracing(cls, *args):
+        if issubclass(cls, Tensor):
+            tracer = tracers.get((id(args[0]),) + args[1:])
+            if tracer is not None:
+                args = (tracer,) + args[1:]
+        return eager(cls, *args)
+
+    with interpreter.interpretation(tracing):
+        output = interpreter.reinterpret(expr)
+
+    if isinstance(output, Tensor):
+        if isinstance(output.data, _Tracer) and output.data._slot is None:
+            _untrace(output.data)  # raises an error
+    elif not isinstance(output, Number):
+        raise ValueError("Expected expression to evaluate to a Tensor or Number, but got {}"
+                         .format(type(output).__name__))
+    return CompiledFunsor(leaves, trace, output)
+
+
+__all__ = [
+    'CompiledFunsor',
+    'compile_funsor',
+]
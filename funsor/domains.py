@@ -9,15 +9,31 @@ import funsor.ops as ops
 from funsor.util import broadcast_shape, get_tracing_state, lazy_property, quote
 
 
+# Interned domains, keyed by (shape, dtype).
+_DOMAIN_CACHE = {}
+
+
 class Domain(namedtuple('Domain', ['shape', 'dtype'])):
     """
     An object representing the type and shape of a :class:`Funsor` input or
     output.
+
+    Domains are interned, so equal domains are the same object.
     """
     def __new__(cls, shape, dtype):
+        # Only exactly typed arguments take the fast path, so that e.g. a
+        # float size cannot hit the equal-hashing entry of an int size.
+        if type(shape) is tuple and type(dtype) in (int, str) and all(type(size) is int for size in shape):
+            result = _DOMAIN_CACHE.get((shape, dtype))
+            if result is not None:
+                return result
         assert isinstance(shape, tuple)
+        shape = tuple(shape)  # e.g. torch.Size
         if get_tracing_state():
+            # Sizes may be traced scalars; intern their concrete values.
             shape = tuple(map(int, shape))
+            if (shape, dtype) in _DOMAIN_CACHE:
+                return _DOMAIN_CACHE[shape, dtype]
         assert all(isinstance(size, int) for size in shape), shape
         if isinstance(dtype, int):
             assert not shape
@@ -25,7 +41,17 @@ class Domain(namedtuple('Domain', ['shape', 'dtype'])):
             assert dtype == 'real'
         else:
             raise ValueError(repr(dtype))
-        return super(Domain, cls).__new__(cls, shape, dtype)
+        result = super(Domain, cls).__new__(cls, shape, dtype)
+        result._hash = tuple.__hash__(result)
+        _DOMAIN_CACHE[shape, dtype] = result
+        return result
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Unpickle through __new__ to return the interned domain.
+        return Domain, (self.shape, self.dtype)
 
     def __repr__(self):
         shape = tuple(self.shape)
@@ -47,7 +73,7 @@ class Domain(namedtuple('Domain', ['shape', 'dtype'])):
     def num_elements(self):
         return reduce(operator.mul, self.shape, 1)
 
-    @property
+    @lazy_property
     def size(self):
         assert isinstance(self.dtype, int)
         return self.dtype
@@ -69,6 +95,10 @@ def bint(size):
     """
     Construct a bounded integer domain of scalar shape.
     """
+    if type(size) is int:
+        result = _DOMAIN_CACHE.get(((), size))
+        if result is not None:
+            return result
     if get_tracing_state():
         size = int(size)
     assert isinstance(size, int) and size >= 0
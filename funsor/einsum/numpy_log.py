@@ -1,14 +1,31 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
+import os
+
 import funsor.ops as ops
 from funsor.einsum.util import Tensordot
 from funsor.util import get_backend
 
 
-def einsum(equation, *operands):
+def einsum(equation, *operands, memory_budget=None):
     """
     Log-sum-exp implementation of einsum.
+
+    If the operands hold more than ``memory_budget`` bytes in total, the
+    contraction is evaluated in blocks, each block with its own shift. Blocks
+    along summed dimensions are combined by ``logaddexp`` and blocks along
+    output dimensions are concatenated. This bounds the size of the
+    exponentiated copies of the operands and avoids underflow in blocks whose
+    values are far below the global maximum. Since a block cannot be smaller
+    than one element per operand, budgets below that are exceeded.
+
+    :param str equation: An einsum equation.
+    :param operands: Arrays of log values.
+    :param int memory_budget: An optional maximum number of operand bytes to
+        exponentiate at once. Defaults to the value of the environment
+        variable ``FUNSOR_EINSUM_MEMORY_BUDGET`` at the time of the call, or
+        no limit if unset.
     """
     if get_backend() != "jax":
         # NB: rename symbols to support NumPy, which allow only symbols a-z.
@@ -16,6 +33,70 @@ def einsum(equation, *operands):
         rename = dict(zip(symbols, 'abcdefghijklmnopqrstuvwxyz'))
         equation = ''.join(rename.get(s, s) for s in equation)
 
+    if memory_budget is None:
+        memory_budget = int(os.environ.get("FUNSOR_EINSUM_MEMORY_BUDGET", 0))
+    if memory_budget:
+        return _blocked_einsum(equation, operands, memory_budget)
+    return _einsum(equation, operands)
+
+
+def _nbytes(x):
+    if hasattr(x, "nbytes"):
+        return int(x.nbytes)
+    return x.element_size() * x.numel()
+
+
+def _logaddexp(x, y):
+    # avoid nan due to -inf - -inf
+    shift = ops.clamp(ops.max(x, y), ops.finfo(x).min, None)
+    return ops.log(ops.exp(x - shift) + ops.exp(y - shift)) + shift
+
+
+def _block(dims, x, dim, block):
+    # Slice every position of a possibly repeated dim, except broadcast ones.
+    index = tuple(block if d == dim and size != 1 else slice(None)
+                  for d, size in zip(dims, x.shape))
+    return x[index]
+
+
+def _blocked_einsum(equation, operands, memory_budget):
+    inputs, output = equation.split('->')
+    inputs = inputs.split(',')
+    if sum(map(_nbytes, operands)) <= memory_budget:
+        return _einsum(equation, operands)
+
+    # Split along the summed dimension, or else the output dimension, shared
+    # by the most operand bytes.
+    sizes = {}
+    nbytes = {}
+    for dims, operand in zip(inputs, operands):
+        for dim, size in zip(dims, operand.shape):
+            sizes[dim] = max(size, sizes.get(dim, 1))
+        for dim in set(dims):
+            nbytes[dim] = nbytes.get(dim, 0) + _nbytes(operand)
+    summed = sorted(dim for dim, size in sizes.items() if dim not in output and size > 1)
+    outputs = sorted(dim for dim, size in sizes.items() if dim in output and size > 1)
+    if not (summed or outputs):
+        return _einsum(equation, operands)
+    dim = max(summed or outputs, key=lambda dim: (nbytes[dim], sizes[dim]))
+    size = sizes[dim]
+    nbytes_without = sum(map(_nbytes, operands)) - nbytes[dim]
+    block_size = max(1, (memory_budget - nbytes_without) * size // nbytes[dim])
+
+    parts = []
+    for start in range(0, size, block_size):
+        block = slice(start, start + block_size)
+        block_operands = [_block(dims, x, dim, block) for dims, x in zip(inputs, operands)]
+        parts.append(_blocked_einsum(equation, block_operands, memory_budget))
+    if dim in output:
+        return ops.cat(output.index(dim), *parts)
+    result = parts[0]
+    for part in parts[1:]:
+        result = _logaddexp(result, part)
+    return result
+
+
+def _einsum(equation, operands):
     inputs, output = equation.split('->')
     if inputs == output:
         return operands[0][...]  # create a new object
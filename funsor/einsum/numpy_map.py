@@ -5,29 +5,103 @@ import operator
 
 from functools import reduce
 
+import opt_einsum
+
 import funsor.ops as ops
 from funsor.einsum.util import Tensordot, broadcast_all
 
 
-def einsum(equation, *operands):
+def einsum(equation, *operands, backtrack=False):
     """
     Forward-max-sum backward-argmax implementation of einsum.
-    This assumes all operands have a ``._pyro_dims`` attribute set.
+    Dims are named by the symbols of ``equation`` , so operands need no
+    ``._pyro_dims`` attribute.
+
+    Operands are contracted pairwise along a greedy ``opt_einsum`` path, and
+    each contracted dim is maxed out as soon as no remaining operand depends
+    on it, so the largest intermediate is the broadcast of a single pair of
+    operands rather than of all operands.
+
+    :param str equation: An einsum equation.
+    :param operands: Arrays of log values.
+    :param bool backtrack: Whether to additionally return the maximizing value
+        of each contracted dim, Viterbi-style.
+    :return: The max-sum contraction, or if ``backtrack`` is true, a pair of
+        the contraction and a dict mapping each contracted dim to an integer
+        array broadcastable to the shape of the contraction.
     """
     inputs, output = equation.split('->')
     inputs = inputs.split(',')
+    sizes = {}
+    for dims, operand in zip(inputs, operands):
+        for dim, size in zip(dims, operand.shape):
+            sizes[dim] = max(size, sizes.get(dim, 1))
+
+    # Max out dims that appear in a single operand.
+    inputs, operands, steps = list(inputs), list(operands), []
+    if len(operands) > 1:
+        for i, dims in enumerate(inputs):
+            others = set(output).union(*(inputs[:i] + inputs[i + 1:]))
+            if not others.issuperset(dims):
+                step_output = ''.join(dim for dim in dims if dim in others)
+                operands[i], argmax = _max_sum([dims], [operands[i]], step_output, backtrack)
+                steps.append((step_output, ''.join(sorted(set(dims) - others)), argmax))
+                inputs[i] = step_output
+
+    if len(operands) > 2:
+        path = opt_einsum.paths.greedy([set(dims) for dims in inputs], set(output), sizes)
+    else:
+        path = [tuple(range(len(operands)))]
+    for ids in path:
+        # Follow opt_einsum's convention of appending each result to the end.
+        ids = sorted(ids, reverse=True)
+        step_inputs = [inputs.pop(i) for i in ids]
+        step_operands = [operands.pop(i) for i in ids]
+        if inputs:
+            others = set(output).union(*inputs)
+            step_output = ''.join(sorted(set().union(*step_inputs) & others))
+        else:
+            step_output = output
+        result, argmax = _max_sum(step_inputs, step_operands, step_output, backtrack)
+        steps.append((step_output, ''.join(sorted(set().union(*step_inputs) - set(step_output))), argmax))
+        inputs.append(step_output)
+        operands.append(result)
+    result, = operands
+    assert len(result.shape) == len(output)
+    if not backtrack:
+        return result
+
+    # Decode contracted dims in reverse order of elimination.
+    values = {}
+    for i, dim in enumerate(output):
+        shape = tuple(sizes[dim] if j == i else 1 for j in range(len(output)))
+        values[dim] = ops.new_arange(result, sizes[dim]).reshape(shape)
+    for step_output, contract_dims, argmax in reversed(steps):
+        if not contract_dims:
+            continue
+        # Dims that were broadcast in every operand of this step have size 1.
+        index = argmax[tuple(values[dim] if size > 1 else 0
+                             for dim, size in zip(step_output, argmax.shape))]
+        for dim in reversed(contract_dims):
+            values[dim] = index % sizes[dim]
+            index = index // sizes[dim]
+    return result, {dim: value for dim, value in values.items() if dim not in output}
+
 
+def _max_sum(inputs, operands, output, backtrack):
     contract_dims = ''.join(sorted(set().union(*inputs) - set(output)))
     dims = output + contract_dims
     result = reduce(operator.add, broadcast_all(*operands, inputs=inputs, dims=dims))
+    argmax = None
     if contract_dims:
         output_shape = result.shape[:len(output)]
-        result = ops.amax(result.reshape(output_shape + (-1,)), -1)
+        result = result.reshape(output_shape + (-1,))
+        if backtrack:
+            argmax = ops.argmax(result, -1)
+        result = ops.amax(result, -1)
     elif result is operands[0]:
         result = result[...]  # create a new object
-    assert len(result.shape) == len(output)
-
-    return result
+    return result, argmax
 
 
 tensordot = Tensordot(einsum)
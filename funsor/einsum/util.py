@@ -66,8 +66,10 @@ def broadcast_all(*values, **kwargs):
     """
     inputs = kwargs.get('inputs')
     dims = kwargs.get('dims')
-    sizes = {dim: size for value, old_dims in zip(values, inputs)
-             for dim, size in zip(old_dims, value.shape)}
+    sizes = {}
+    for value, old_dims in zip(values, inputs):
+        for dim, size in zip(old_dims, value.shape):
+            sizes[dim] = max(size, sizes.get(dim, 1))
     if dims is None:
         dims = ''.join(sorted(sizes))
     else:
@@ -76,8 +78,9 @@ def broadcast_all(*values, **kwargs):
     values = list(values)
     for i, (x, old_dims) in enumerate(zip(values, inputs)):
         if old_dims != dims:
+            old_sizes = dict(zip(old_dims, x.shape))
             x = ops.permute(x, tuple(old_dims.index(dim) for dim in dims if dim in old_dims))
-            x = x.reshape(tuple(sizes[dim] if dim in old_dims else 1 for dim in dims))
+            x = x.reshape(tuple(old_sizes.get(dim, 1) for dim in dims))
             x = ops.expand(x, shape)
             assert len(x.shape) == len(dims)
             values[i] = x
@@ -1,9 +1,11 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
+import functools
 import math
 from collections import OrderedDict, defaultdict
 from functools import reduce
+from weakref import WeakKeyDictionary
 
 import numpy as np
 
@@ -54,15 +56,61 @@ def _compute_offsets(inputs):
     :rtype: tuple
     """
     assert isinstance(inputs, OrderedDict)
+    try:
+        return _OFFSETS_CACHE[inputs]
+    except (KeyError, TypeError):  # TypeError for unhashable inputs
+        pass
     offsets = OrderedDict()
     total = 0
     for key, domain in inputs.items():
         if domain.dtype == 'real':
             offsets[key] = total
             total += domain.num_elements
+    try:
+        _OFFSETS_CACHE[inputs] = offsets, total
+    except TypeError:
+        pass
     return offsets, total
 
 
+# Offsets of interned (hence hashable) funsor inputs.
+_OFFSETS_CACHE = WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=1024)
+def _compute_marginal_intervals(inputs, reduced_reals):
+    """
+    Computes the coalesced intervals of kept and reduced real dims for
+    marginalizing out ``reduced_reals`` from a Gaussian with ``inputs``.
+
+    :return: a pair ``(a, b)`` of lists of ``(start, stop)`` intervals of the
+        kept and reduced dims, respectively.
+    :rtype: tuple
+    """
+    a = []
+    b = []
+    offsets, _ = _compute_offsets(inputs)
+    for key, start in offsets.items():
+        intervals = b if key in reduced_reals else a
+        stop = start + inputs[key].num_elements
+        if intervals and intervals[-1][1] == start:
+            intervals[-1] = intervals[-1][0], stop
+        else:
+            intervals.append((start, stop))
+    return tuple(a), tuple(b)
+
+
+def _take_intervals(x, dim, intervals):
+    """
+    Takes coalesced intervals along ``dim`` (either -1 or -2) of ``x``. This
+    is a view when there is a single interval.
+    """
+    assert dim in (-1, -2)
+    parts = [x[..., start:stop] if dim == -1 else x[..., start:stop, :]
+             for start, stop in intervals]
+    return parts[0] if len(parts) == 1 else ops.cat(dim, *parts)
+
+
 def _find_intervals(intervals, end):
     """
     Finds a complete set of intervals partitioning [0, end), given a partial
@@ -218,6 +266,81 @@ def align_gaussian(new_inputs, old):
     return info_vec, precision
 
 
+def gaussian_tensordot(lhs, rhs, reduced_vars):
+    """
+    Computes ``(lhs + rhs).reduce(ops.logaddexp, reduced_vars)`` for two
+    Gaussians that share exactly the real inputs ``reduced_vars``, by
+    eliminating the shared block directly from the blocks of each operand,
+    without materializing the joint precision over all real inputs.
+
+    :param Gaussian lhs: A Gaussian over real inputs ``a`` and ``b``.
+    :param Gaussian rhs: A Gaussian over real inputs ``b`` and ``c``.
+    :param frozenset reduced_vars: The names of the shared real inputs ``b``.
+    :return: The sum of a :class:`~funsor.tensor.Tensor` log normalizer and
+        a :class:`Gaussian` over ``a`` and ``c`` (if any).
+    :rtype: ~funsor.terms.Funsor
+    """
+    assert isinstance(lhs, Gaussian)
+    assert isinstance(rhs, Gaussian)
+    assert isinstance(reduced_vars, frozenset)
+    int_inputs = OrderedDict((k, d) for k, d in lhs.inputs.items() if d.dtype != 'real')
+    int_inputs.update((k, d) for k, d in rhs.inputs.items() if d.dtype != 'real')
+    a = OrderedDict((k, d) for k, d in lhs.inputs.items() if d.dtype == 'real' and k not in reduced_vars)
+    b = OrderedDict((k, d) for k, d in lhs.inputs.items() if k in reduced_vars)
+    c = OrderedDict((k, d) for k, d in rhs.inputs.items() if d.dtype == 'real' and k not in reduced_vars)
+    assert all(d.dtype == 'real' for d in b.values())
+    assert frozenset(b) == reduced_vars
+    assert reduced_vars.issubset(rhs.inputs)
+    assert not any(k in rhs.inputs for k in a)
+
+    # Align each operand to int_inputs plus its own real inputs.
+    lhs_inputs = int_inputs.copy()
+    lhs_inputs.update(a)
+    lhs_inputs.update(b)
+    rhs_inputs = int_inputs.copy()
+    rhs_inputs.update(b)
+    rhs_inputs.update(c)
+    lhs_info_vec, lhs_precision = align_gaussian(lhs_inputs, lhs)
+    rhs_info_vec, rhs_precision = align_gaussian(rhs_inputs, rhs)
+    na = _compute_offsets(a)[1]
+    nb = _compute_offsets(b)[1]
+    nc = _compute_offsets(c)[1]
+    batch_shape = broadcast_shape(lhs_info_vec.shape[:-1], rhs_info_vec.shape[:-1])
+
+    # Eliminate the shared block b.
+    prec_b = ops.cholesky(lhs_precision[..., na:, na:] + rhs_precision[..., :nb, :nb])
+    info_b = lhs_info_vec[..., na:] + rhs_info_vec[..., :nb]
+    b_tmp = ops.triangular_solve(ops.unsqueeze(info_b, -1), prec_b)
+    log_normalizer = (0.5 * nb * math.log(2 * math.pi) - _log_det_tri(prec_b) +
+                      0.5 * (b_tmp[..., 0] ** 2).sum(-1))
+    log_normalizer = Tensor(ops.expand(log_normalizer, batch_shape), int_inputs)
+    if na + nc == 0:
+        return log_normalizer
+
+    # Assemble the kept blocks a and c, with zero cross-precision.
+    n = na + nc
+    prec_ba = BlockMatrix(batch_shape + (nb, n))
+    precision = BlockMatrix(batch_shape + (n, n))
+    info_vec = BlockVector(batch_shape + (n,))
+    if na:
+        prec_ba[..., 0:nb, 0:na] = ops.expand(lhs_precision[..., na:, :na], batch_shape + (nb, na))
+        precision[..., 0:na, 0:na] = ops.expand(lhs_precision[..., :na, :na], batch_shape + (na, na))
+        info_vec[..., 0:na] = ops.expand(lhs_info_vec[..., :na], batch_shape + (na,))
+    if nc:
+        prec_ba[..., 0:nb, na:n] = ops.expand(rhs_precision[..., :nb, nb:], batch_shape + (nb, nc))
+        precision[..., na:n, na:n] = ops.expand(rhs_precision[..., nb:, nb:], batch_shape + (nc, nc))
+        info_vec[..., na:n] = ops.expand(rhs_info_vec[..., nb:], batch_shape + (nc,))
+    prec_a = ops.triangular_solve(prec_ba.as_tensor(), prec_b)
+    prec_at = ops.transpose(prec_a, -1, -2)
+    precision = precision.as_tensor() - ops.matmul(prec_at, prec_a)
+    info_vec = info_vec.as_tensor() - ops.matmul(prec_at, b_tmp)[..., 0]
+
+    inputs = int_inputs.copy()
+    inputs.update(a)
+    inputs.update(c)
+    return log_normalizer + Gaussian(info_vec, precision, inputs)
+
+
 class GaussianMeta(FunsorMeta):
     """
     Wrapper to convert between OrderedDict and tuple.
@@ -533,29 +656,24 @@ class Gaussian(Funsor, metaclass=GaussianMeta):
                 result = self.log_normalizer
             else:
                 int_inputs = OrderedDict((k, v) for k, v in inputs.items() if v.dtype != 'real')
-                offsets, _ = _compute_offsets(self.inputs)
-                a = []
-                b = []
-                for key, domain in self.inputs.items():
-                    if domain.dtype == 'real':
-                        block = ops.new_arange(self.info_vec, offsets[key], offsets[key] + domain.num_elements, 1)
-                        (b if key in reduced_vars else a).append(block)
-                a = ops.cat(-1, *a)
-                b = ops.cat(-1, *b)
-                prec_aa = self.precision[..., a[..., None], a]
-                prec_ba = self.precision[..., b[..., None], a]
-                prec_bb = self.precision[..., b[..., None], b]
+                # Slice out blocks, avoiding copies for contiguous blocks.
+                a, b = _compute_marginal_intervals(self.inputs, reduced_reals)
+                prec_a_ = _take_intervals(self.precision, -2, a)
+                prec_b_ = _take_intervals(self.precision, -2, b)
+                prec_aa = _take_intervals(prec_a_, -1, a)
+                prec_ba = _take_intervals(prec_b_, -1, a)
+                prec_bb = _take_intervals(prec_b_, -1, b)
                 prec_b = ops.cholesky(prec_bb)
                 prec_a = ops.triangular_solve(prec_ba, prec_b)
                 prec_at = ops.transpose(prec_a, -1, -2)
                 precision = prec_aa - ops.matmul(prec_at, prec_a)
 
-                info_a = self.info_vec[..., a]
-                info_b = self.info_vec[..., b]
+                info_a = _take_intervals(self.info_vec, -1, a)
+                info_b = _take_intervals(self.info_vec, -1, b)
                 b_tmp = ops.triangular_solve(info_b[..., None], prec_b)
                 info_vec = info_a - ops.matmul(prec_at, b_tmp)[..., 0]
 
-                log_prob = Tensor(0.5 * len(b) * math.log(2 * math.pi) - _log_det_tri(prec_b) +
+                log_prob = Tensor(0.5 * info_b.shape[-1] * math.log(2 * math.pi) - _log_det_tri(prec_b) +
                                   0.5 * (b_tmp[..., 0] ** 2).sum(-1),
                                   int_inputs)
                 result = log_prob + Gaussian(info_vec, precision, inputs)
@@ -662,4 +780,5 @@ __all__ = [
     'BlockVector',
     'Gaussian',
     'align_gaussian',
+    'gaussian_tensordot',
 ]
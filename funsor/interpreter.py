@@ -1,8 +1,10 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
+import contextvars
 import functools
 import inspect
+import itertools
 import os
 import re
 import types
@@ -12,24 +14,33 @@ from functools import singledispatch
 
 import numpy as np
 
+import funsor.profiler as profiler
 from funsor.domains import Domain
 from funsor.ops import Op, is_numeric_array
-from funsor.registry import KeyedRegistry
+from funsor.registry import DispatchChain, KeyedRegistry
 from funsor.util import is_nn_module
 
 _ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 _DEBUG = int(os.environ.get("FUNSOR_DEBUG", 0))
-_STACK_SIZE = 0
+_USE_TCO = int(os.environ.get("FUNSOR_USE_TCO", 1))
 
-_INTERPRETATION = None  # To be set later in funsor.terms
-_USE_TCO = int(os.environ.get("FUNSOR_USE_TCO", 0))
+# Interpreter state is context-local, so that threads and asyncio tasks can
+# run different interpretations concurrently. Contexts that have not set an
+# interpretation use the default interpretation.
+_STACK_SIZE = contextvars.ContextVar("funsor_stack_size", default=0)
+_INTERPRETATION = contextvars.ContextVar("funsor_interpretation")
+_PRUNE = contextvars.ContextVar("funsor_prune", default=None)  # see reinterpret()
+_DEFAULT_INTERPRETATION = None  # To be set later in funsor.terms
 
-_GENSYM_COUNTER = 0
+# Fresh names must be unique across contexts, so this counter is shared.
+# Advancing an itertools.count is atomic under the GIL.
+_GENSYM_COUNTER = itertools.count(1)
 
 
 def _indent():
-    result = u'    \u2502' * (_STACK_SIZE // 4 + 3)
-    return result[:_STACK_SIZE]
+    size = _STACK_SIZE.get()
+    result = u'    \u2502' * (size // 4 + 3)
+    return result[:size]
 
 
 if _DEBUG:
@@ -43,13 +54,12 @@ if _DEBUG:
             self._message = "{} file://{} {}".format(fn.__name__, path, lineno)
 
         def __call__(self, *args, **kwargs):
-            global _STACK_SIZE
             print(_indent() + self._message)
-            _STACK_SIZE += 1
+            token = _STACK_SIZE.set(_STACK_SIZE.get() + 1)
             try:
                 return self.fn(*args, **kwargs)
             finally:
-                _STACK_SIZE -= 1
+                _STACK_SIZE.reset(token)
 
         @property
         def register(self):
@@ -61,6 +71,9 @@ if _DEBUG:
         return DebugLogged(fn)
 else:
     def debug_logged(fn):
+        prof = profiler._PROFILE.get()
+        if prof is not None:
+            return prof.wrap(fn)
         return fn
 
 
@@ -71,11 +84,10 @@ def _classname(cls):
 class Interpreter:
     @property
     def __call__(self):
-        return _INTERPRETATION
+        return _INTERPRETATION.get(_DEFAULT_INTERPRETATION)
 
 
 def debug_interpret(cls, *args):
-    global _STACK_SIZE
     indent = _indent()
     if _DEBUG > 1:
         typenames = [_classname(cls)] + [_classname(type(arg)) for arg in args]
@@ -83,11 +95,11 @@ def debug_interpret(cls, *args):
         typenames = [cls.__name__] + [type(arg).__name__ for arg in args]
     print(indent + ' '.join(typenames))
 
-    _STACK_SIZE += 1
+    token = _STACK_SIZE.set(_STACK_SIZE.get() + 1)
     try:
-        result = _INTERPRETATION(cls, *args)
+        result = get_interpretation()(cls, *args)
     finally:
-        _STACK_SIZE -= 1
+        _STACK_SIZE.reset(token)
 
     if _DEBUG > 1:
         result_str = re.sub('\n', '\n          ' + indent, str(result))
@@ -100,22 +112,31 @@ def debug_interpret(cls, *args):
 interpret = debug_interpret if _DEBUG else Interpreter()
 
 
+def get_interpretation():
+    """
+    Returns the interpretation of the current context, i.e. of the current
+    thread or :mod:`asyncio` task.
+    """
+    return _INTERPRETATION.get(_DEFAULT_INTERPRETATION)
+
+
 def set_interpretation(new):
+    """
+    Sets the interpretation of the current context, i.e. of the current
+    thread or :mod:`asyncio` task. Other contexts are unaffected.
+    """
     assert callable(new)
-    global _INTERPRETATION
-    _INTERPRETATION = new
+    _INTERPRETATION.set(new)
 
 
 @contextmanager
 def interpretation(new):
     assert callable(new)
-    global _INTERPRETATION
-    old = _INTERPRETATION
+    token = _INTERPRETATION.set(new)
     try:
-        _INTERPRETATION = new
         yield
     finally:
-        _INTERPRETATION = old
+        _INTERPRETATION.reset(token)
 
 
 @singledispatch
@@ -138,9 +159,20 @@ def recursion_reinterpret(x):
 
 # We need to register this later in terms.py after declaring Funsor.
 # reinterpret.register(Funsor)
+def is_pruned(x):
+    """
+    Returns whether the recursive :func:`reinterpret` should return a
+    subexpression as-is, according to its ``prune`` predicate.
+    """
+    prune = _PRUNE.get()
+    return prune is not None and prune(x)
+
+
 @debug_logged
 def reinterpret_funsor(x):
-    return _INTERPRETATION(type(x), *map(recursion_reinterpret, x._ast_values))
+    if is_pruned(x):
+        return x
+    return get_interpretation()(type(x), *map(recursion_reinterpret, x._ast_values))
 
 
 _ground_types = (
@@ -224,9 +256,7 @@ def is_atom(x):
 
 
 def gensym(x=None):
-    global _GENSYM_COUNTER
-    _GENSYM_COUNTER += 1
-    sym = _GENSYM_COUNTER
+    sym = next(_GENSYM_COUNTER)
     if x is not None:
         if isinstance(x, str):
             return x + "_" + str(sym)
@@ -234,10 +264,34 @@ def gensym(x=None):
     return "V" + str(sym)
 
 
-def stack_reinterpret(x):
+# Per-type cache of (children function, node kind) used by stack_reinterpret(),
+# invalidated whenever a new children() implementation is registered.
+_NODE_TYPES = {}
+_NODE_TYPES_VERSION = 0
+_GROUND, _TUPLE, _DICT, _FUNSOR = range(4)
+
+
+def _node_type(x):
+    cls = type(x)
+    if isinstance(x, _ground_types) or is_numeric_array(x) or is_nn_module(x):
+        result = None, _GROUND
+    elif isinstance(x, (tuple, frozenset)):
+        result = children.dispatch(cls), _TUPLE
+    elif isinstance(x, dict):
+        result = children.dispatch(cls), _DICT
+    else:
+        result = children.dispatch(cls), _FUNSOR
+    _NODE_TYPES[cls] = result
+    return result
+
+
+def stack_reinterpret(x, prune=None):
     r"""
     Overloaded reinterpretation of a deferred expression.
-    This interpreter uses an explicit stack and no recursion but is much slower.
+    This interpreter uses an explicit stack and no recursion, so it is not
+    subject to the recursion limit. Subexpressions shared between multiple
+    parents (e.g. cons-hashed :class:`~funsor.terms.Funsor` s appearing
+    several times in a DAG) are reinterpreted only once.
 
     This handles a limited class of expressions, raising
     ``ValueError`` in unhandled cases.
@@ -245,54 +299,57 @@ def stack_reinterpret(x):
     :param x: An input, typically involving deferred
         :class:`~funsor.terms.Funsor` s.
     :type x: A funsor or data structure holding funsors.
+    :param callable prune: An optional predicate on
+        :class:`~funsor.terms.Funsor` s. Subexpressions satisfying this
+        predicate are returned as-is rather than reinterpreted.
     :return: A reinterpreted version of the input.
     :raises: ValueError
     """
-    x_name = gensym(x)
-    node_vars = {x_name: x}
-    node_names = {x: x_name}
+    # Nodes are identified by id(), which is safe because every node is kept
+    # alive by x for the duration of this call. Ground values are never stored
+    # in env. Each stack entry is a tuple (node, children_fn, kind, node_children),
+    # where node_children is None until the node's children have been scheduled,
+    # after which the node is rebuilt from the reinterpreted values of its
+    # children, resulting in a post-order traversal.
+    global _NODE_TYPES_VERSION
+    if _NODE_TYPES_VERSION != len(children.registry):
+        _NODE_TYPES.clear()
+        _NODE_TYPES_VERSION = len(children.registry)
+    get_node_type = _NODE_TYPES.get
+    interpret = get_interpretation()
+    fn, kind = get_node_type(type(x)) or _node_type(x)
+    if kind == _GROUND or (prune is not None and kind == _FUNSOR and prune(x)):
+        return x
     env = {}
-    stack = [(x_name, x)]
-    parent_to_children = OrderedDict()
-    child_to_parents = OrderedDict()
+    stack = [(x, fn, kind, None)]
+    push = stack.append
+    pop = stack.pop
     while stack:
-        h_name, h = stack.pop(0)
-        parent_to_children[h_name] = []
-        for c in children(h):
-            if c in node_names:
-                c_name = node_names[c]
-            else:
-                c_name = gensym(c)
-                node_names[c] = c_name
-                node_vars[c_name] = c
-                stack.append((c_name, c))
-            parent_to_children.setdefault(h_name, []).append(c_name)
-            child_to_parents.setdefault(c_name, []).append(h_name)
-
-    children_counts = OrderedDict((k, len(v)) for k, v in parent_to_children.items())
-    leaves = [name for name, count in children_counts.items() if count == 0]
-    while leaves:
-        h_name = leaves.pop(0)
-        if h_name in child_to_parents:
-            for parent in child_to_parents[h_name]:
-                children_counts[parent] -= 1
-                if children_counts[parent] == 0:
-                    leaves.append(parent)
-
-        h = node_vars[h_name]
-        if is_atom(h):
-            env[h_name] = h
-        elif isinstance(h, (tuple, frozenset)):
-            env[h_name] = type(h)(
-                env[c_name] for c_name in parent_to_children[h_name])
+        h, fn, kind, h_children = pop()
+        if h_children is None:
+            if id(h) in env:
+                continue
+            h_children = fn(h) if kind == _FUNSOR else tuple(fn(h))
+            push((h, fn, kind, h_children))
+            for c in reversed(h_children):
+                c_fn, c_kind = get_node_type(type(c)) or _node_type(c)
+                if c_kind != _GROUND and id(c) not in env:
+                    if prune is not None and c_kind == _FUNSOR and prune(c):
+                        env[id(c)] = c
+                    else:
+                        push((c, c_fn, c_kind, None))
         else:
-            env[h_name] = _INTERPRETATION(
-                type(h), *(env[c_name] for c_name in parent_to_children[h_name]))
-
-    return env[x_name]
+            args = tuple(env.get(id(c), c) for c in h_children)
+            if kind == _FUNSOR:
+                env[id(h)] = interpret(type(h), *args)
+            elif kind == _TUPLE:
+                env[id(h)] = type(h)(args)
+            else:
+                env[id(h)] = type(h)(zip(h.keys(), args))
+    return env[id(x)]
 
 
-def reinterpret(x):
+def reinterpret(x, prune=None):
     r"""
     Overloaded reinterpretation of a deferred expression.
 
@@ -302,13 +359,19 @@ def reinterpret(x):
     :param x: An input, typically involving deferred
         :class:`~funsor.terms.Funsor` s.
     :type x: A funsor or data structure holding funsors.
+    :param callable prune: An optional predicate on
+        :class:`~funsor.terms.Funsor` s. Subexpressions satisfying this
+        predicate are returned as-is rather than reinterpreted.
     :return: A reinterpreted version of the input.
     :raises: ValueError
     """
     if _USE_TCO:
-        return stack_reinterpret(x)
-    else:
+        return stack_reinterpret(x, prune)
+    token = _PRUNE.set(prune)
+    try:
         return recursion_reinterpret(x)
+    finally:
+        _PRUNE.reset(token)
 
 
 def dispatched_interpretation(fn):
@@ -321,9 +384,28 @@ def dispatched_interpretation(fn):
     else:
         fn.register = registry.register
     fn.dispatch = registry.dispatch
+    fn.registry = registry
     return fn
 
 
+def dispatch_chain(*interpretations, name=None):
+    """
+    Creates a :class:`~funsor.registry.DispatchChain` that tries the patterns
+    of each of a sequence of dispatched interpretations in turn, e.g.::
+
+        eager_dispatch = dispatch_chain(eager, normalize)
+
+    :param interpretations: One or more functions decorated by
+        :func:`dispatched_interpretation`, in order of priority.
+    :param str name: An optional name used by :mod:`funsor.profiler` .
+        Defaults to the name of the first interpretation.
+    :rtype: ~funsor.registry.DispatchChain
+    """
+    if name is None:
+        name = interpretations[0].__name__
+    return DispatchChain(*(i.registry for i in interpretations), name=name)
+
+
 class PatternMissingError(NotImplementedError):
     def __str__(self):
         return f"{super().__str__()}\nThis is most likely due to a missing pattern."
@@ -331,7 +413,9 @@ class PatternMissingError(NotImplementedError):
 
 __all__ = [
     'PatternMissingError',
+    'dispatch_chain',
     'dispatched_interpretation',
+    'get_interpretation',
     'interpret',
     'interpretation',
     'reinterpret',
@@ -30,26 +30,31 @@ ops.transpose.register(array, int, int)(np.swapaxes)
 ops.unsqueeze.register(array, int)(np.expand_dims)
 
 
-@ops.all.register(array, (int, type(None)))
+@ops.all.register(array, (int, tuple, type(None)))
 def _all(x, dim):
     return np.all(x, axis=dim)
 
 
-@ops.amax.register(array, (int, type(None)))
+@ops.amax.register(array, (int, tuple, type(None)))
 def _amax(x, dim, keepdims=False):
     return np.amax(x, axis=dim, keepdims=keepdims)
 
 
-@ops.amin.register(array, (int, type(None)))
+@ops.amin.register(array, (int, tuple, type(None)))
 def _amin(x, dim, keepdims=False):
     return np.amin(x, axis=dim, keepdims=keepdims)
 
 
-@ops.any.register(array, (int, type(None)))
+@ops.any.register(array, (int, tuple, type(None)))
 def _any(x, dim):
     return np.any(x, axis=dim)
 
 
+@ops.argmax.register(array, int)
+def _argmax(x, dim):
+    return np.argmax(x, axis=dim)
+
+
 @ops.astype.register(array, str)
 def _astype(x, dtype):
     return x.astype(dtype)
@@ -124,7 +129,7 @@ def _log(x):
     return np.log(x)
 
 
-@ops.logsumexp.register(array, (int, type(None)))
+@ops.logsumexp.register(array, (int, tuple, type(None)))
 def _logsumexp(x, dim):
     return logsumexp(x, axis=dim)
 
@@ -181,7 +186,7 @@ def _new_zeros(x, shape):
     return onp.zeros(shape, dtype=x.dtype)
 
 
-@ops.prod.register(array, (int, type(None)))
+@ops.prod.register(array, (int, tuple, type(None)))
 def _prod(x, dim):
     return np.prod(x, axis=dim)
 
@@ -215,7 +220,7 @@ def _stack(dim, *x):
     return np.stack(x, axis=dim)
 
 
-@ops.sum.register(array, (int, type(None)))
+@ops.sum.register(array, (int, tuple, type(None)))
 def _sum(x, dim):
     return np.sum(x, axis=dim)
 
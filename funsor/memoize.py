@@ -1,27 +1,173 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
-from collections import Hashable
+from collections import OrderedDict
+from collections.abc import Hashable
 from contextlib import contextmanager
 
 import funsor.interpreter as interpreter
+from funsor.ops import is_numeric_array
+
+
+class _IdKey(object):
+    """
+    Identity-hashed key for an unhashable arg. This holds a reference to the
+    arg so that its ``id()`` cannot be reused while the key is cached.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __hash__(self):
+        return id(self.value)
+
+    def __eq__(self, other):
+        return type(other) is _IdKey and other.value is self.value
+
+
+def _array_nbytes(x):
+    if hasattr(x, "nbytes"):
+        return int(x.nbytes)
+    return x.element_size() * x.numel()
+
+
+def _nbytes(x):
+    """
+    Estimates the number of bytes of array data held directly by a value.
+    Child funsors are not traversed, since they may be shared across results.
+    """
+    if is_numeric_array(x):
+        return _array_nbytes(x)
+    ast_values = getattr(x, "_ast_values", None)
+    if ast_values is None:
+        return 0
+    return sum(_array_nbytes(v) for v in ast_values if is_numeric_array(v))
+
+
+class MemoizeCache(object):
+    """
+    A bounded least-recently-used cache for use with :func:`memoize`, which
+    keeps hit, miss and eviction statistics. A cache can be reused across
+    multiple ``with memoize(cache):`` blocks, e.g. in a long-running
+    service::
+
+        cache = MemoizeCache(max_size=10000, max_bytes=2 ** 30)
+        for request in requests:
+            with memoize(cache):
+                handle(request)
+        print(cache.stats())
+
+    :param int max_size: The maximum number of cached results, or ``None``
+        for unbounded.
+    :param int max_bytes: The maximum total number of bytes of array data held
+        by cached results, or ``None`` for unbounded. Results larger than this
+        budget are not cached.
+    """
+    def __init__(self, max_size=None, max_bytes=None):
+        assert max_size is None or max_size > 0
+        assert max_bytes is None or max_bytes > 0
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __getitem__(self, key):
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        nbytes = _nbytes(value) if self.max_bytes is not None else 0
+        if key in self._entries:
+            self._pop(key)
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+        self._entries[key] = value, nbytes
+        self.nbytes += nbytes
+        while ((self.max_size is not None and len(self._entries) > self.max_size) or
+               (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            self._pop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def __delitem__(self, key):
+        self._pop(key)
+
+    def _pop(self, key):
+        value, nbytes = self._entries.pop(key)
+        self.nbytes -= nbytes
+        return value
+
+    def clear(self):
+        """
+        Removes all cached results and resets statistics.
+        """
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """
+        :return: A dict of cache statistics.
+        :rtype: dict
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "nbytes": self.nbytes,
+        }
+
+    def __repr__(self):
+        return "MemoizeCache({})".format(", ".join(
+            "{}={}".format(k, v) for k, v in self.stats().items()))
 
 
 @contextmanager
 def memoize(cache=None):
     """
     Exploit cons-hashing to do implicit common subexpression elimination
+
+    :param cache: An optional dict-like cache, e.g. a :class:`MemoizeCache` ,
+        which may be shared across multiple ``memoize`` blocks. Defaults to
+        a new unbounded ``dict``.
     """
     if cache is None:
         cache = {}
 
-    @interpreter.interpretation(interpreter._INTERPRETATION)  # use base
+    @interpreter.interpretation(interpreter.get_interpretation())  # use base
     def memoize_interpretation(cls, *args):
-        key = (cls,) + tuple(id(arg) if (type(arg).__name__ == "DeviceArray") or not isinstance(arg, Hashable)
+        key = (cls,) + tuple(_IdKey(arg) if (type(arg).__name__ == "DeviceArray") or not isinstance(arg, Hashable)
                              else arg for arg in args)
-        if key not in cache:
-            cache[key] = cls(*args)
-        return cache[key]
+        try:
+            return cache[key]
+        except KeyError:
+            result = cls(*args)
+            cache[key] = result
+            return result
 
     with interpreter.interpretation(memoize_interpretation):
         yield cache
+
+
+__all__ = [
+    'MemoizeCache',
+    'memoize',
+]
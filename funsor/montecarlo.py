@@ -1,11 +1,12 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
+import contextvars
 from collections import OrderedDict
 from contextlib import contextmanager
 
 from funsor.integrate import Integrate
-from funsor.interpreter import dispatched_interpretation, interpretation
+from funsor.interpreter import dispatch_chain, dispatched_interpretation, interpretation
 from funsor.terms import Funsor, eager
 
 
@@ -17,38 +18,54 @@ def monte_carlo(cls, *args):
     cases.
     """
     # TODO Memoize sample statements in a context manager.
-    result = monte_carlo.dispatch(cls, *args)(*args)
+    result = _monte_carlo_dispatch(cls, *args)
     if result is None:
         result = eager(cls, *args)
     return result
 
 
-# This is a globally configurable parameter to draw multiple samples.
+_monte_carlo_dispatch = dispatch_chain(monte_carlo)
+
+
+# This is a globally configurable parameter to draw multiple samples. Each
+# thread or asyncio task can override it via monte_carlo_interpretation().
 monte_carlo.sample_inputs = OrderedDict()
+_SAMPLE_INPUTS = contextvars.ContextVar("funsor_sample_inputs", default=None)
+
+
+def _get_sample_inputs():
+    """
+    Returns the ``sample_inputs`` of the current thread or :mod:`asyncio`
+    task, defaulting to ``monte_carlo.sample_inputs`` .
+
+    :rtype: OrderedDict
+    """
+    sample_inputs = _SAMPLE_INPUTS.get()
+    return monte_carlo.sample_inputs if sample_inputs is None else sample_inputs
 
 
 @contextmanager
 def monte_carlo_interpretation(**sample_inputs):
     """
-    Context manager to set ``monte_carlo.sample_inputs`` and
-    install the :func:`monte_carlo` interpretation.
+    Context manager to set the ``sample_inputs`` of the current thread or
+    :mod:`asyncio` task and install the :func:`monte_carlo` interpretation.
     """
-    old = monte_carlo.sample_inputs
-    monte_carlo.sample_inputs = OrderedDict(sample_inputs)
+    token = _SAMPLE_INPUTS.set(OrderedDict(sample_inputs))
     try:
         with interpretation(monte_carlo):
             yield
     finally:
-        monte_carlo.sample_inputs = old
+        _SAMPLE_INPUTS.reset(token)
 
 
 @monte_carlo.register(Integrate, Funsor, Funsor, frozenset)
 def monte_carlo_integrate(log_measure, integrand, reduced_vars):
     # FIXME: how to pass rng_key to here?
-    sample = log_measure.sample(reduced_vars, monte_carlo.sample_inputs)
+    sample_inputs = _get_sample_inputs()
+    sample = log_measure.sample(reduced_vars, sample_inputs)
     if sample is log_measure:
         return None  # cannot progress
-    reduced_vars |= frozenset(monte_carlo.sample_inputs).intersection(sample.inputs)
+    reduced_vars |= frozenset(sample_inputs).intersection(sample.inputs)
     return Integrate(sample, integrand, reduced_vars)
 
 
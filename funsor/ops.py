@@ -323,6 +323,7 @@ all = Op(np.all)
 amax = Op(np.amax)
 amin = Op(np.amin)
 any = Op(np.any)
+argmax = Op(np.argmax)
 astype = Dispatcher("ops.astype")
 cat = Dispatcher("ops.cat")
 clamp = Dispatcher("ops.clamp")
@@ -545,6 +546,7 @@ __all__ = [
     'amin',
     'and_',
     'any',
+    'argmax',
     'astype',
     'cat',
     'cholesky',
@@ -14,14 +14,15 @@ from funsor.terms import Funsor, eager, lazy, normalize
 
 @interpreter.dispatched_interpretation
 def unfold(cls, *args):
-    result = unfold.dispatch(cls, *args)(*args)
-    if result is None:
-        result = normalize.dispatch(cls, *args)(*args)
+    result = _unfold_dispatch(cls, *args)
     if result is None:
         result = lazy(cls, *args)
     return result
 
 
+_unfold_dispatch = interpreter.dispatch_chain(unfold, normalize)
+
+
 @unfold.register(Contraction, AssociativeOp, AssociativeOp, frozenset, tuple)
 def unfold_contraction_generic_tuple(red_op, bin_op, reduced_vars, terms):
 
@@ -56,12 +57,15 @@ unfold.register(Contraction, AssociativeOp, AssociativeOp, frozenset, Variadic[F
 
 @interpreter.dispatched_interpretation
 def optimize(cls, *args):
-    result = optimize.dispatch(cls, *args)(*args)
+    result = _optimize_dispatch(cls, *args)
     if result is None:
         result = eager(cls, *args)
     return result
 
 
+_optimize_dispatch = interpreter.dispatch_chain(optimize)
+
+
 # TODO set a better value for this
 REAL_SIZE = 3  # the "size" of a real-valued dimension passed to the path optimizer
 
@@ -129,9 +133,9 @@ def optimize_contract_finitary_funsor(red_op, bin_op, reduced_vars, terms):
 
 def apply_optimizer(x):
 
-    @interpreter.interpretation(interpreter._INTERPRETATION)
+    @interpreter.interpretation(interpreter.get_interpretation())
     def nested_optimize_interpreter(cls, *args):
-        result = optimize.dispatch(cls, *args)(*args)
+        result = _optimize_dispatch(cls, *args)
         if result is None:
             result = cls(*args)
         return result
@@ -0,0 +1,197 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+import contextvars
+import json
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+# The active Profile of the current context, if any.
+_PROFILE = contextvars.ContextVar("funsor_profile", default=None)
+
+
+def _pattern_name(fn):
+    fn = getattr(fn, "fn", fn)  # unwrap DebugLogged
+    name = getattr(fn, "__qualname__", None) or type(fn).__name__
+    if "<lambda>" in name:
+        code = getattr(fn, "__code__", None)
+        if code is not None:
+            name = "{}:{}".format(name, code.co_firstlineno)
+    return name
+
+
+class PatternStats(object):
+    """
+    Statistics of calls to a single pattern.
+
+    :ivar int calls: The number of times the pattern was called.
+    :ivar int fired: The number of calls that returned a result rather than
+        ``None``, i.e. that were not deferred to a lower priority pattern.
+    :ivar float total_time: Cumulative time in seconds, including time spent
+        in nested patterns.
+    :ivar float self_time: Time in seconds excluding time spent in nested
+        patterns.
+    """
+    __slots__ = ("calls", "fired", "total_time", "self_time")
+
+    def __init__(self):
+        self.calls = 0
+        self.fired = 0
+        self.total_time = 0.
+        self.self_time = 0.
+
+    def as_dict(self):
+        return OrderedDict((k, getattr(self, k)) for k in self.__slots__)
+
+
+class Profile(object):
+    """
+    Collects pattern statistics while active in a :func:`profile` block.
+
+    :ivar dict patterns: A dict mapping pattern name (e.g.
+        ``"eager_binary_tensor_tensor"`` or ``"Gaussian.eager_reduce"``) to
+        :class:`PatternStats` .
+    :ivar ~collections.Counter fallthrough: A counter mapping
+        ``(interpretation, funsor class name)`` pairs to the number of times
+        no pattern of that interpretation applied. For interpretations
+        falling back to :func:`~funsor.terms.reflect` this counts terms that
+        were left lazy.
+    """
+    def __init__(self):
+        self.patterns = {}
+        self.fallthrough = Counter()
+        self._stack = [0.]  # time spent in nested patterns, per active frame
+
+    def clear(self):
+        self.patterns.clear()
+        self.fallthrough.clear()
+
+    def call(self, name, fn, *args, **kwargs):
+        stack = self._stack
+        stack.append(0.)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            stack[-1] += elapsed
+            stats = self.patterns.get(name)
+            if stats is None:
+                stats = self.patterns[name] = PatternStats()
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.self_time += elapsed - nested
+        if result is not None:
+            stats.fired += 1
+        return result
+
+    def wrap(self, fn):
+        """
+        Wraps a callable to record its calls under its qualified name.
+        """
+        name = _pattern_name(fn)
+
+        def profiled(*args, **kwargs):
+            return self.call(name, fn, *args, **kwargs)
+
+        return profiled
+
+    def dispatch(self, chain, key, *args):
+        """
+        Profiled version of :meth:`funsor.registry.DispatchChain.__call__` .
+        """
+        for fn in chain.handlers(key, *args):
+            result = self.call(_pattern_name(fn), fn, *args)
+            if result is not None:
+                return result
+        self.fallthrough[chain.name, getattr(key, "__origin__", key).__name__] += 1
+        return None
+
+    def as_dict(self):
+        """
+        :return: A JSON-serializable dict of all statistics.
+        :rtype: dict
+        """
+        return OrderedDict([
+            ("patterns", OrderedDict((name, stats.as_dict())
+                                     for name, stats in sorted(self.patterns.items(),
+                                                               key=lambda kv: -kv[1].self_time))),
+            ("fallthrough", [OrderedDict([("interpretation", interp), ("funsor", cls), ("count", count)])
+                             for (interp, cls), count in self.fallthrough.most_common()]),
+        ])
+
+    def to_json(self, **kwargs):
+        """
+        Serializes statistics to a JSON string.
+
+        :param kwargs: Keyword arguments passed to :func:`json.dumps` .
+        :rtype: str
+        """
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def table(self, sort_by="self_time", limit=None):
+        """
+        Formats statistics as a human readable table.
+
+        :param str sort_by: One of "calls", "fired", "total_time" or
+            "self_time". Patterns are sorted in decreasing order.
+        :param int limit: Optional maximum number of patterns to show.
+        :rtype: str
+        """
+        assert sort_by in PatternStats.__slots__
+        items = sorted(self.patterns.items(), key=lambda kv: -getattr(kv[1], sort_by))[:limit]
+        width = max([len("pattern")] + [len(name) for name, _ in items])
+        lines = ["{:<{}} {:>10} {:>10} {:>12} {:>12}".format(
+            "pattern", width, "calls", "fired", "total (ms)", "self (ms)")]
+        for name, s in items:
+            lines.append("{:<{}} {:>10} {:>10} {:>12.3f} {:>12.3f}".format(
+                name, width, s.calls, s.fired, 1e3 * s.total_time, 1e3 * s.self_time))
+        if self.fallthrough:
+            lines.append("")
+            width = max(len(interp) + len(cls) + 2 for interp, cls in self.fallthrough)
+            width = max(width, len("fallthrough"))
+            lines.append("{:<{}} {:>10}".format("fallthrough", width, "count"))
+            for (interp, cls), count in self.fallthrough.most_common(limit):
+                lines.append("{:<{}} {:>10}".format("{}: {}".format(interp, cls), width, count))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.table()
+
+
+@contextmanager
+def profile(prof=None):
+    """
+    Context manager to record pattern statistics of all dispatched
+    interpretations, e.g.::
+
+        with profile() as prof:
+            model()
+        print(prof.table(limit=20))
+        stats = prof.to_json()
+
+    Patterns are recorded by their qualified names, including methods like
+    ``Tensor.eager_reduce`` that are called via generic patterns. Profiles
+    may be nested, in which case the innermost profile records statistics.
+    A profile records only the current thread or :mod:`asyncio` task.
+
+    :param Profile prof: An optional :class:`Profile` to accumulate into.
+    :return: The active profile.
+    :rtype: Profile
+    """
+    if prof is None:
+        prof = Profile()
+    token = _PROFILE.set(prof)
+    try:
+        yield prof
+    finally:
+        _PROFILE.reset(token)
+
+
+__all__ = [
+    'PatternStats',
+    'Profile',
+    'profile',
+]
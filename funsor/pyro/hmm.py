@@ -18,7 +18,12 @@ from funsor.pyro.convert import (
     tensor_to_funsor
 )
 from funsor.pyro.distribution import FunsorDistribution
-from funsor.sum_product import MarkovProduct, naive_sequential_sum_product, sequential_sum_product
+from funsor.sum_product import (
+    MarkovProduct,
+    naive_sequential_sum_product,
+    sequential_sum_product,
+    sequential_sum_product_levels
+)
 from funsor.terms import Variable, eager, lazy, moment_matching
 
 
@@ -97,6 +102,7 @@ class DiscreteHMM(FunsorDistribution):
             self._init = init
             self._trans = trans
             self._obs = obs
+        self._scan_cache = None
 
         super(DiscreteHMM, self).__init__(funsor_dist, batch_shape, event_shape, dtype, validate_args)
 
@@ -109,21 +115,84 @@ class DiscreteHMM(FunsorDistribution):
         if self._validate_args:
             self._validate_sample(value)
         ndims = max(len(self.batch_shape), value.dim() - self.event_dim)
-        time = Variable("time", bint(self.event_shape[0]))
-        value = tensor_to_funsor(value, ("time",), event_output=self.event_dim - 1,
-                                 dtype=self.dtype)
 
         # Compare with pyro.distributions.hmm.DiscreteHMM.log_prob().
-        obs = self._obs(value=value)
-        result = self._trans + obs
-        result = sequential_sum_product(ops.logaddexp, ops.add,
-                                        result, time, {"state": "state(time=1)"})
+        result = self._scan_levels(value)[-1](time=0)
         result = self._init + result.reduce(ops.logaddexp, "state(time=1)")
         result = result.reduce(ops.logaddexp, "state")
 
         result = funsor_to_tensor(result, ndims=ndims)
         return result
 
+    def _scan_levels(self, value):
+        # The levels of the parallel scan are cached for the most recent
+        # value, so that .sample_posterior() can reuse the work of .log_prob().
+        cache = self._scan_cache
+        if cache is not None and cache[0] is value and cache[1] == value._version:
+            return cache[2]
+
+        time = Variable("time", bint(self.event_shape[0]))
+        obs = self._obs(value=tensor_to_funsor(value, ("time",), event_output=self.event_dim - 1,
+                                               dtype=self.dtype))
+        levels = sequential_sum_product_levels(ops.logaddexp, ops.add, self._trans + obs,
+                                               time, {"state": "state(time=1)"})
+        self._scan_cache = value, value._version, levels
+        return levels
+
+    @torch.no_grad()
+    def sample_posterior(self, value, sample_shape=torch.Size()):
+        """
+        Draws joint samples of the latent states conditioned on observed
+        ``value``, by a top-down pass over the levels of the parallel scan
+        used by :meth:`log_prob` . This costs O(time) work in O(log(time))
+        depth, and reuses the scan of a preceding :meth:`log_prob` call with
+        the same ``value`` .
+
+        :param ~torch.Tensor value: Observed data.
+        :param torch.Size sample_shape: The shape of independent samples.
+        :return: A tensor of latent states of shape
+            ``sample_shape + batch_shape + (num_steps,)`` .
+        :rtype: ~torch.Tensor
+        """
+        if self._validate_args:
+            self._validate_sample(value)
+        sample_shape = torch.Size(sample_shape)
+        ndims = max(len(self.batch_shape), value.dim() - self.event_dim)
+        batch_shape = broadcast_shape(self.batch_shape, value.shape[:value.dim() - self.event_dim])
+        batch_shape = (1,) * (ndims - len(batch_shape)) + batch_shape
+        shape = sample_shape + batch_shape
+        levels = self._scan_levels(value)
+        durations = [self.event_shape[0]]
+        while durations[-1] > 1:
+            durations.append((durations[-1] + 1) // 2)
+        event_inputs = ("time", "state", "state(time=1)")
+        state_dim = self._trans.inputs["state"].size
+
+        # Jointly sample the first and last states from the top level.
+        init = funsor_to_tensor(self._init, ndims + 1, ("state",))
+        top = funsor_to_tensor(levels[-1], ndims + 3, event_inputs)[..., 0, :, :]
+        logits = (init.unsqueeze(-1) + top).expand(batch_shape + (state_dim, state_dim))
+        index = torch.distributions.Categorical(logits=logits.reshape(batch_shape + (-1,))).sample(sample_shape)
+        states = torch.stack([index // state_dim, index % state_dim], -1)
+
+        # Sample the midpoint of each pair of steps, descending one level at a time.
+        for level, duration in zip(reversed(levels[:-1]), reversed(durations[:-1])):
+            level = funsor_to_tensor(level, ndims + 3, event_inputs)
+            level = level.expand(shape + (duration, state_dim, state_dim))
+            num_pairs = duration // 2
+            prev = states[..., :num_pairs]
+            curr = states[..., 1:num_pairs + 1]
+            logits = (level[..., 0:2 * num_pairs:2, :, :].gather(
+                          -2, prev[..., None, None].expand(prev.shape + (1, state_dim))).squeeze(-2) +
+                      level[..., 1:2 * num_pairs:2, :, :].gather(
+                          -1, curr[..., None, None].expand(curr.shape + (state_dim, 1))).squeeze(-1))
+            middle = torch.distributions.Categorical(logits=logits).sample()
+            parent, states = states, states.new_empty(shape + (duration + 1,))
+            states[..., 0::2] = parent[..., :(duration + 2) // 2]
+            states[..., duration] = parent[..., -1]
+            states[..., 1:2 * num_pairs:2] = middle
+        return states[..., 1:]
+
     # TODO remove this once self.funsor_dist is defined.
     def _sample_delta(self, sample_shape):
         raise NotImplementedError("TODO")
@@ -135,6 +204,7 @@ class DiscreteHMM(FunsorDistribution):
         new._init = self._init + tensor_to_funsor(torch.zeros(batch_shape))
         new._trans = self._trans
         new._obs = self._obs
+        new._scan_cache = None
         super(DiscreteHMM, new).__init__(
             self.funsor_dist, batch_shape, self.event_shape, self.dtype, validate_args=False)
         new.validate_args = self.__dict__.get('_validate_args')
@@ -1,10 +1,64 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
+import importlib
+import threading
 from collections import defaultdict
 
 from multipledispatch import Dispatcher
 
+import funsor.profiler as profiler
+
+# Modules whose import registers patterns. These are imported before the first
+# dispatch rather than by ``import funsor``, to keep startup fast.
+_DEFERRED_MODULES = []
+_DEFERRED_LOCK = threading.RLock()
+_IMPORTING = set()  # deferred modules whose import is in progress
+
+
+def defer_import(*names):
+    """
+    Defers the import of pattern-registering modules until the first dispatch
+    through any :class:`KeyedRegistry` .
+
+    :param str names: Fully qualified module names.
+    """
+    with _DEFERRED_LOCK:
+        _DEFERRED_MODULES.extend(names)
+
+
+def import_deferred():
+    """
+    Imports all modules deferred by :func:`defer_import` .
+
+    :return: Whether any module was imported.
+    :rtype: bool
+    """
+    if not _DEFERRED_MODULES:
+        return False
+    # Other threads block until all imports complete. Names are removed only
+    # after their import finishes, and are skipped by reentrant calls that
+    # dispatch while a module is being imported.
+    #
+    # _DEFERRED_LOCK is held while importlib takes per-module import locks, so
+    # it must always be acquired first. This holds because deferred modules do
+    # not dispatch at import time: a thread that plainly imports one, e.g.
+    # funsor.cnf, never waits on _DEFERRED_LOCK while holding a module lock.
+    imported = False
+    with _DEFERRED_LOCK:
+        for name in tuple(_DEFERRED_MODULES):
+            if name in _IMPORTING:
+                continue
+            _IMPORTING.add(name)
+            try:
+                importlib.import_module(name)
+            finally:
+                _IMPORTING.discard(name)
+            if name in _DEFERRED_MODULES:
+                _DEFERRED_MODULES.remove(name)
+            imported = True
+    return imported
+
 
 class PartialDispatcher(Dispatcher):
     """
@@ -44,6 +98,7 @@ class KeyedRegistry(object):
     def __init__(self, default=None):
         self.default = default if default is None else PartialDefault(default)
         self.registry = defaultdict(lambda: PartialDispatcher('f'))
+        self._chains = []  # DispatchChains whose caches depend on this registry
 
     def register(self, key, *types):
         key = getattr(key, "__origin__", key)
@@ -58,6 +113,8 @@ class KeyedRegistry(object):
         # than the original function).
         def decorator(fn):
             register(*types)(fn)
+            for chain in self._chains:
+                chain.clear_cache()
             return fn
 
         return decorator
@@ -72,12 +129,77 @@ class KeyedRegistry(object):
         return self.registry.get(key, self.default)
 
     def __call__(self, key, *args):
+        if _DEFERRED_MODULES:
+            import_deferred()
         return self[key](*args)
 
     def dispatch(self, key, *args):
+        if _DEFERRED_MODULES:
+            import_deferred()
         return self[key].partial_call(*args)
 
+    def is_default(self, fn):
+        return self.default is not None and (fn is self.default or fn is self.default.default)
+
+
+class DispatchChain(object):
+    """
+    Fused dispatch through a fallback chain of :class:`KeyedRegistry` s.
+
+    Calling a chain tries the handler dispatched from each registry in turn,
+    returning the first result that is not ``None``, or ``None`` if every
+    handler declines. The tuple of non-default handlers is cached for each
+    ``(key, arg types)`` signature, so repeated calls perform a single dict
+    lookup rather than one dispatch per registry. The cache is cleared
+    whenever a new pattern is registered in any of the chained registries.
+
+    :param KeyedRegistry registries: One or more registries, in order of
+        priority.
+    :param str name: An optional name used by :mod:`funsor.profiler` .
+    """
+    def __init__(self, *registries, name=None):
+        assert registries and all(isinstance(r, KeyedRegistry) for r in registries)
+        self.registries = registries
+        self.name = name
+        self._cache = {}
+        for registry in registries:
+            registry._chains.append(self)
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def handlers(self, key, *args):
+        """
+        Returns the tuple of non-default handlers for a given signature.
+        """
+        signature = (key,) + tuple(map(type, args))
+        try:
+            return self._cache[signature]
+        except KeyError:
+            pass
+        handlers = []
+        for registry in self.registries:
+            fn = registry.dispatch(key, *args)
+            if not registry.is_default(fn):
+                handlers.append(fn)
+        handlers = tuple(handlers)
+        self._cache[signature] = handlers
+        return handlers
+
+    def __call__(self, key, *args):
+        prof = profiler._PROFILE.get()
+        if prof is not None:
+            return prof.dispatch(self, key, *args)
+        for fn in self.handlers(key, *args):
+            result = fn(*args)
+            if result is not None:
+                return result
+        return None
+
 
 __all__ = [
+    'DispatchChain',
     'KeyedRegistry',
+    'defer_import',
+    'import_deferred',
 ]
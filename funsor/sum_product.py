@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import re
+import timeit
 from collections import OrderedDict, defaultdict
 from functools import reduce
 
@@ -10,9 +11,11 @@ import numpy as np
 import funsor.ops as ops
 from funsor.cnf import Contraction
 from funsor.domains import bint
+from funsor.interpreter import get_interpretation
 from funsor.ops import UNITS, AssociativeOp
+from funsor.tensor import Tensor, numeric_array
 from funsor.terms import Cat, Funsor, FunsorMeta, Number, Slice, Stack, Subs, Variable, eager, substitute, to_funsor
-from funsor.util import quote
+from funsor.util import get_backend, quote
 
 
 def _partition(terms, sum_vars):
@@ -184,6 +187,208 @@ def sequential_sum_product(sum_op, prod_op, trans, time, step):
     return trans(**{time: 0})
 
 
+def _step_to_drop(step):
+    # Returns renamings of the prev and curr variables of step to shared
+    # dummy names, plus the set of dummy names to contract.
+    step = OrderedDict(sorted(step.items()))
+    drop = tuple("_drop_{}".format(i) for i in range(len(step)))
+    prev_to_drop = dict(zip(step.keys(), drop))
+    curr_to_drop = dict(zip(step.values(), drop))
+    return prev_to_drop, curr_to_drop, frozenset(drop)
+
+
+def _interleave(time, even, odd):
+    # Merges even and odd time steps into a single funsor along time.
+    num_even = even.inputs[time].size
+    duration = num_even + odd.inputs[time].size
+    index = [t // 2 if t % 2 == 0 else num_even + t // 2 for t in range(duration)]
+    index = Tensor(numeric_array(index), OrderedDict([(time, bint(duration))]), dtype=duration)
+    return Cat(time, (even, odd))(**{time: index})
+
+
+def _sequential_down_sweep(sum_op, prod_op, levels, time, prev_to_drop, curr_to_drop, drop):
+    # Combines the levels of sequential_sum_product_levels into inclusive prefix and
+    # suffix products, touching each level once on the way back down.
+    prefix = suffix = levels[-1]
+    for level in reversed(levels[:-1]):
+        duration = level.inputs[time].size
+        num_parent = (duration + 1) // 2
+        num_pairs = (duration - 1) // 2
+
+        # prefix[2t+1] = parent[t] and prefix[2t] = parent[t-1] * level[2t].
+        odd = prefix(**{time: Slice(time, 0, duration // 2, 1, num_parent)})
+        even = level(**{time: Slice(time, 0, 1, 1, duration)})
+        if num_pairs:
+            x = prefix(**{time: Slice(time, 0, num_pairs, 1, num_parent)}, **curr_to_drop)
+            y = level(**{time: Slice(time, 2, duration, 2, duration)}, **prev_to_drop)
+            even = Cat(time, (even, Contraction(sum_op, prod_op, drop, x, y)))
+        prefix = _interleave(time, even, odd)
+
+        # suffix[2t] = parent[t] and suffix[2t+1] = level[2t+1] * parent[t+1].
+        parts = []
+        if num_pairs:
+            x = level(**{time: Slice(time, 1, 2 * num_pairs, 2, duration)}, **curr_to_drop)
+            y = suffix(**{time: Slice(time, 1, num_pairs + 1, 1, num_parent)}, **prev_to_drop)
+            parts.append(Contraction(sum_op, prod_op, drop, x, y))
+        if duration % 2 == 0:
+            parts.append(level(**{time: Slice(time, duration - 1, duration, 1, duration)}))
+        odd = parts[0] if len(parts) == 1 else Cat(time, tuple(parts))
+        suffix = _interleave(time, suffix, odd)
+    return prefix, suffix
+
+
+def sequential_sum_product_levels(sum_op, prod_op, trans, time, step):
+    """
+    Computes the same parallel scan as :func:`sequential_sum_product` but
+    returns every level of the scan rather than only the final result. The
+    first level is ``trans`` itself and each following level has
+    ``ceil(duration / 2)`` time steps, where::
+
+        levels[k + 1](time=t) == sequential_sum_product(
+            sum_op, prod_op, levels[k](time=Slice("time", 2 * t, 2 * t + 2)),
+            Variable("time", bint(2)), step)
+
+        levels[-1](time=0) == sequential_sum_product(sum_op, prod_op, trans, time, step)
+
+    except that a trailing odd step is copied unchanged. Retaining the levels
+    allows later top-down passes, e.g. backward sampling, to reuse the
+    forward computation.
+
+    :param ~funsor.ops.AssociativeOp sum_op: A semiring sum operation.
+    :param ~funsor.ops.AssociativeOp prod_op: A semiring product operation.
+    :param ~funsor.terms.Funsor trans: A transition funsor.
+    :param Variable time: The time input dimension.
+    :param dict step: A dict mapping previous variables to current variables.
+        This can contain multiple pairs of prev->curr variable names.
+    :return: A list of funsors, the last of which has ``time`` of size 1.
+    :rtype: list
+    """
+    assert isinstance(sum_op, AssociativeOp)
+    assert isinstance(prod_op, AssociativeOp)
+    assert isinstance(trans, Funsor)
+    assert isinstance(time, Variable)
+    assert isinstance(step, dict)
+    assert all(isinstance(k, str) for k in step.keys())
+    assert all(isinstance(v, str) for v in step.values())
+    if time.name in trans.inputs:
+        assert time.output == trans.inputs[time.name]
+
+    prev_to_drop, curr_to_drop, drop = _step_to_drop(step)
+
+    time, duration = time.name, time.output.size
+    levels = [trans]
+    while duration > 1:
+        even_duration = duration // 2 * 2
+        x = trans(**{time: Slice(time, 0, even_duration, 2, duration)}, **curr_to_drop)
+        y = trans(**{time: Slice(time, 1, even_duration, 2, duration)}, **prev_to_drop)
+        contracted = Contraction(sum_op, prod_op, drop, x, y)
+
+        if duration > even_duration:
+            extra = trans(**{time: Slice(time, duration - 1, duration)})
+            contracted = Cat(time, (contracted, extra))
+        trans = contracted
+        duration = (duration + 1) // 2
+        levels.append(trans)
+    return levels
+
+
+def sequential_sum_product_marginals(sum_op, prod_op, trans, time, step):
+    """
+    For a funsor ``trans`` with dimensions ``time``, ``prev`` and ``curr``,
+    computes the marginal of each transition factor, i.e. the product of all
+    factors summed over all variables except the ``prev`` and ``curr`` of that
+    factor, equivalent to::
+
+        marginals[t] = sum_product(sum_op, prod_op,
+                                   [trans(time=s) for s in range(duration)],
+                                   eliminate=all_vars - {x[t], x[t+1]})
+
+    where ``x[t]`` and ``x[t+1]`` are the ``prev`` and ``curr`` variables of
+    ``trans(time=t)`` . Reducing any marginal over ``prev`` and ``curr``
+    yields the total ``sequential_sum_product(...).reduce(sum_op)`` .
+
+    This is the parallel smoother of [1]: the forward and backward messages
+    are computed by a down-sweep over the levels of the parallel scan of
+    :func:`sequential_sum_product` , in O(log(time)) depth and O(time) work.
+
+    **References**
+
+    [1] Simo Sarkka, Angel F. Garcia-Fernandez (2019)
+        "Temporal Parallelization of Bayesian Filters and Smoothers"
+        https://arxiv.org/pdf/1905.13002.pdf
+
+    :param ~funsor.ops.AssociativeOp sum_op: A semiring sum operation.
+    :param ~funsor.ops.AssociativeOp prod_op: A semiring product operation.
+    :param ~funsor.terms.Funsor trans: A transition funsor.
+    :param Variable time: The time input dimension.
+    :param dict step: A dict mapping previous variables to current variables.
+        This can contain multiple pairs of prev->curr variable names.
+    :return: A funsor with the same inputs as ``trans`` .
+    :rtype: ~funsor.terms.Funsor
+    """
+    assert isinstance(trans, Funsor) and time.name in trans.inputs
+    levels = sequential_sum_product_levels(sum_op, prod_op, trans, time, step)
+    time, duration = time.name, time.output.size
+    if duration == 1:
+        return trans
+    prev_to_drop, curr_to_drop, drop = _step_to_drop(step)
+    prefix, suffix = _sequential_down_sweep(sum_op, prod_op, levels, time, prev_to_drop, curr_to_drop, drop)
+
+    # Each factor but the first receives a forward message over its prev variables.
+    forward = prefix(**{time: Slice(time, 0, duration - 1, 1, duration)})
+    forward = forward.reduce(sum_op, frozenset(step.keys()))
+    forward = forward(**{curr: prev for prev, curr in step.items()})
+    head = trans(**{time: Slice(time, 0, 1, 1, duration)})
+    tail = trans(**{time: Slice(time, 1, duration, 1, duration)})
+    result = Cat(time, (head, prod_op(tail, forward)))
+
+    # Each factor but the last receives a backward message over its curr variables.
+    backward = suffix(**{time: Slice(time, 1, duration, 1, duration)})
+    backward = backward.reduce(sum_op, frozenset(step.values()))
+    backward = backward(**{prev: curr for prev, curr in step.items()})
+    init = result(**{time: Slice(time, 0, duration - 1, 1, duration)})
+    last = result(**{time: Slice(time, duration - 1, duration, 1, duration)})
+    return Cat(time, (prod_op(init, backward), last))
+
+
+# Maps the signature of each autotuned call to mixed_sequential_sum_product
+# to an OrderedDict from candidate num_segments to measured time in seconds.
+# Clear this to force retuning.
+NUM_SEGMENTS_MEASUREMENTS = {}
+
+
+def _autotune_num_segments(sum_op, prod_op, trans, time, step, repeat=3):
+    # Returns the fastest num_segments for this signature, plus the result of
+    # its benchmark run if a benchmark was just performed.
+    duration = time.output.size
+    dtype = getattr(getattr(trans, "data", None), "dtype", trans.dtype)
+    key = (get_backend(), type(trans), dtype, sum_op, prod_op, tuple(trans.inputs.items()),
+           duration, tuple(sorted(step.items())))
+    measurements = NUM_SEGMENTS_MEASUREMENTS.get(key)
+    if measurements is not None:
+        return min(measurements, key=measurements.__getitem__), None
+
+    # Try powers of two between a fully serial and a fully parallel scan,
+    # plus the sqrt(duration) segmentation that balances the two stages.
+    candidates = {1, duration, max(1, int(round(duration ** 0.5)))}
+    candidates.update(2 ** i for i in range(duration.bit_length()) if 2 ** i < duration)
+    measurements = OrderedDict()
+    best_result = None
+    for num_segments in sorted(candidates):
+        # The first run is an untimed warmup; keep the fastest of the rest.
+        result = mixed_sequential_sum_product(sum_op, prod_op, trans, time, step, num_segments)
+        times = []
+        for _ in range(repeat):
+            start = timeit.default_timer()
+            mixed_sequential_sum_product(sum_op, prod_op, trans, time, step, num_segments)
+            times.append(timeit.default_timer() - start)
+        measurements[num_segments] = min(times)
+        if measurements[num_segments] == min(measurements.values()):
+            best_result = result
+    NUM_SEGMENTS_MEASUREMENTS[key] = measurements
+    return min(measurements, key=measurements.__getitem__), best_result
+
+
 def mixed_sequential_sum_product(sum_op, prod_op, trans, time, step, num_segments=None):
     """
     For a funsor ``trans`` with dimensions ``time``, ``prev`` and ``curr``,
@@ -204,9 +409,22 @@ def mixed_sequential_sum_product(sum_op, prod_op, trans, time, step, num_segment
     :param Variable time: The time input dimension.
     :param dict step: A dict mapping previous variables to current variables.
         This can contain multiple pairs of prev->curr variable names.
-    :param int num_segments: number of segments for the first stage
+    :param num_segments: number of segments for the first stage, or
+        ``"auto"`` to benchmark candidate segmentations on the first call with
+        a given signature of ``trans`` and reuse the fastest afterwards. The
+        measurements are recorded in :data:`NUM_SEGMENTS_MEASUREMENTS` .
+        Autotuning is only performed under the :func:`~funsor.terms.eager`
+        interpretation; otherwise ``"auto"`` falls back to ``duration`` .
+    :type num_segments: int or str
     """
     time_var, time, duration = time, time.name, time.output.size
+    if num_segments == "auto":
+        if get_interpretation() is not eager:
+            num_segments = duration
+        else:
+            num_segments, result = _autotune_num_segments(sum_op, prod_op, trans, time_var, step)
+            if result is not None:
+                return result
     num_segments = duration if num_segments is None else num_segments
     assert num_segments > 0 and duration > 0
 
@@ -244,6 +462,98 @@ def mixed_sequential_sum_product(sum_op, prod_op, trans, time, step, num_segment
     return second_stage_result
 
 
+class SequentialFilter(object):
+    """
+    Online version of :func:`sequential_sum_product` that consumes transition
+    factors one step, or one chunk of steps, at a time. The filter holds a
+    single forward ``message``, a funsor of the ``prev`` variables before the
+    first step and the ``curr`` variables after the latest step, so the cost
+    of each update is independent of the length of the history.
+
+    Example::
+
+        f = SequentialFilter(ops.logaddexp, ops.add, {"x_prev": "x_curr"})
+        for trans in stream:                 # inputs x_prev, x_curr
+            f.update(trans)
+            belief = f.message.reduce(ops.logaddexp, "x_prev")
+        checkpoint = f.checkpoint()
+        f.update(chunk, time="time")         # inputs time, x_prev, x_curr
+        f.restore(checkpoint)                # undoes the previous update
+
+    After consuming ``trans_1, ..., trans_T`` the message is equal to
+    ``sequential_sum_product(sum_op, prod_op, trans, time, step)`` where
+    ``trans`` stacks ``trans_1, ..., trans_T`` along ``time``.
+
+    :param ~funsor.ops.AssociativeOp sum_op: A semiring sum operation.
+    :param ~funsor.ops.AssociativeOp prod_op: A semiring product operation.
+    :param dict step: A dict mapping previous variables to current variables.
+        This can contain multiple pairs of prev->curr variable names.
+    """
+    def __init__(self, sum_op, prod_op, step):
+        assert isinstance(sum_op, AssociativeOp)
+        assert isinstance(prod_op, AssociativeOp)
+        assert isinstance(step, dict)
+        assert all(isinstance(k, str) for k in step.keys())
+        assert all(isinstance(v, str) for v in step.values())
+        self.sum_op = sum_op
+        self.prod_op = prod_op
+        self.step = OrderedDict(sorted(step.items()))
+        self._prev_to_drop, self._curr_to_drop, self._drop = _step_to_drop(self.step)
+        self.message = None
+        self.num_steps = 0
+
+    def update(self, trans, time=None):
+        """
+        Consumes a single transition factor, or a chunk of transition factors
+        along a ``time`` input.
+
+        :param ~funsor.terms.Funsor trans: A transition funsor with inputs
+            ``prev`` and ``curr``, and optionally ``time``.
+        :param time: An optional time dimension of ``trans``.
+        :type time: str or Variable
+        :return: The updated message.
+        :rtype: ~funsor.terms.Funsor
+        """
+        assert isinstance(trans, Funsor)
+        num_steps = 1
+        if time is not None:
+            if isinstance(time, str):
+                time = Variable(time, trans.inputs[time])
+            assert isinstance(time, Variable)
+            num_steps = time.output.size
+            trans = sequential_sum_product(self.sum_op, self.prod_op, trans, time, self.step)
+        if self.message is None:
+            self.message = trans
+        else:
+            x = self.message(**self._curr_to_drop)
+            y = trans(**self._prev_to_drop)
+            self.message = Contraction(self.sum_op, self.prod_op, self._drop, x, y)
+        self.num_steps += num_steps
+        return self.message
+
+    def checkpoint(self):
+        """
+        Returns an immutable snapshot of the filter state, which can later be
+        passed to :meth:`restore` .
+
+        :rtype: tuple
+        """
+        return self.message, self.num_steps
+
+    def restore(self, checkpoint):
+        """
+        Restores the filter state from a snapshot returned by
+        :meth:`checkpoint` .
+
+        :param tuple checkpoint: A snapshot of the filter state.
+        """
+        message, num_steps = checkpoint
+        assert message is None or isinstance(message, Funsor)
+        assert isinstance(num_steps, int) and num_steps >= 0
+        self.message = message
+        self.num_steps = num_steps
+
+
 def naive_sarkka_bilmes_product(sum_op, prod_op, trans, time_var, global_vars=frozenset()):
 
     assert isinstance(global_vars, frozenset)
@@ -328,9 +638,9 @@ def sarkka_bilmes_product(sum_op, prod_op, trans, time_var, global_vars=frozense
     block_step = {shift_name(name, period): name for name in block_trans.inputs
                   if name != time and name not in global_vars and get_shift(name) < period}
     block_time_var = Variable(time_var.name, bint(duration // period))
+    num_segments = "auto" if num_periods == "auto" else max(1, duration // (period * num_periods))
     final_chunk = mixed_sequential_sum_product(
-        sum_op, prod_op, block_trans, block_time_var, block_step,
-        num_segments=max(1, duration // (period * num_periods)))
+        sum_op, prod_op, block_trans, block_time_var, block_step, num_segments=num_segments)
     final_sum_vars = frozenset(
         shift_name(name, t) for name in original_names for t in range(1, period))
     result = final_chunk.reduce(sum_op, final_sum_vars)
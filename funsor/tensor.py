@@ -112,6 +112,8 @@ class Tensor(Funsor, metaclass=TensorMeta):
     :param dtype: optional output datatype. Defaults to "real".
     :type dtype: int or the string "real".
     """
+    __slots__ = ("data",)
+
     def __init__(self, data, inputs=None, dtype="real"):
         assert ops.is_numeric_array(data)
         assert isinstance(inputs, tuple)
@@ -212,51 +214,58 @@ class Tensor(Funsor, metaclass=TensorMeta):
         # materialize after checking for renaming case
         subs = OrderedDict((k, self.materialize(v)) for k, v in subs.items())
 
+        # Substitute Numbers by basic indexing, which returns a view.
+        data = self.data
+        self_inputs = self.inputs
+        if any(isinstance(v, Number) for v in subs.values()):
+            data = data[tuple(int(subs[k].data) if isinstance(subs.get(k), Number) else slice(None)
+                              for k in self_inputs)]
+            self_inputs = OrderedDict((k, d) for k, d in self_inputs.items()
+                                      if not isinstance(subs.get(k), Number))
+            subs = OrderedDict((k, v) for k, v in subs.items() if not isinstance(v, Number))
+            if not subs:
+                return Tensor(data, self_inputs, self.dtype)
+
         # Compute result shapes.
         inputs = OrderedDict()
-        for k, domain in self.inputs.items():
+        for k, domain in self_inputs.items():
             if k in subs:
                 inputs.update(subs[k].inputs)
             else:
                 inputs[k] = domain
 
-        # Construct a dict with each input's positional dim,
-        # counting from the right so as to support broadcasting.
-        total_size = len(inputs) + len(self.output.shape)  # Assumes only scalar indices.
-        new_dims = {}
-        for k, domain in inputs.items():
-            assert not domain.shape
-            new_dims[k] = len(new_dims) - total_size
-
-        # Use advanced indexing to construct a simultaneous substitution.
+        # Gather by advanced indexing, where each index Tensor is broadcast
+        # over the inputs of all index Tensors. Preserved inputs shared with
+        # an index Tensor are indexed by a broadcastable arange; all other
+        # preserved inputs are sliced, so no dense index grid is built.
+        index_names = tuple(k for k in inputs if any(k in v.inputs for v in subs.values()))
         index = []
-        for k, domain in self.inputs.items():
+        for k, domain in self_inputs.items():
             if k in subs:
-                v = subs.get(k)
-                if isinstance(v, Number):
-                    index.append(int(v.data))
-                else:
-                    # Permute and expand v.data to end up at new_dims.
-                    assert isinstance(v, Tensor)
-                    v = v.align(tuple(k2 for k2 in inputs if k2 in v.inputs))
-                    assert isinstance(v, Tensor)
-                    v_shape = [1] * total_size
-                    for k2, size in zip(v.inputs, v.data.shape):
-                        v_shape[new_dims[k2]] = size
-                    index.append(v.data.reshape(tuple(v_shape)))
+                v = subs[k]
+                assert isinstance(v, Tensor)
+                v = v.align(tuple(k2 for k2 in index_names if k2 in v.inputs))
+                index.append(v.data.reshape(tuple(v.inputs[k2].dtype if k2 in v.inputs else 1
+                                                  for k2 in index_names)))
+            elif k in index_names:
+                index.append(ops.new_arange(data, domain.dtype).reshape(
+                    tuple(domain.dtype if k2 == k else 1 for k2 in index_names)))
             else:
-                # Construct a [:] slice for this preserved input.
-                offset_from_right = -1 - new_dims[k]
-                index.append(ops.new_arange(self.data, domain.dtype).reshape(
-                    (-1,) + (1,) * offset_from_right))
-
-        # Construct a [:] slice for the output.
-        for i, size in enumerate(self.output.shape):
-            offset_from_right = len(self.output.shape) - i - 1
-            index.append(ops.new_arange(self.data, size).reshape(
-                (-1,) + (1,) * offset_from_right))
-
-        data = self.data[tuple(index)]
+                index.append(slice(None))
+        data = data[tuple(index)]
+
+        # Advanced indexing puts the broadcast index dims in place of the
+        # indexed dims if those are adjacent, and first otherwise.
+        positions = [i for i, x in enumerate(index) if not isinstance(x, slice)]
+        sliced_names = [k for k, x in zip(self_inputs, index) if isinstance(x, slice)]
+        if positions[-1] - positions[0] + 1 == len(positions):
+            start = positions[0]
+            names = sliced_names[:start] + list(index_names) + sliced_names[start:]
+        else:
+            names = list(index_names) + sliced_names
+        if names != list(inputs):
+            data = ops.permute(data, tuple(names.index(k) for k in inputs) +
+                               tuple(range(len(names), len(data.shape))))
         return Tensor(data, inputs, self.dtype)
 
     def eager_unary(self, op):
@@ -277,15 +286,13 @@ class Tensor(Funsor, metaclass=TensorMeta):
             if reduced_vars == self_vars and not self.output.shape:
                 return Tensor(numeric_op(self.data, None), dtype=self.dtype)
 
-            # Reduce one dim at a time.
-            data = self.data
-            offset = 0
-            for k, domain in self.inputs.items():
-                if k in reduced_vars:
-                    assert not domain.shape
-                    data = numeric_op(data, offset)
-                else:
-                    offset += 1
+            if not reduced_vars:
+                return self
+
+            # Reduce all dims in a single call, avoiding intermediate arrays.
+            dims = tuple(i for i, k in enumerate(self.inputs) if k in reduced_vars)
+            assert all(not self.inputs[k].shape for k in reduced_vars)
+            data = numeric_op(self.data, dims[0] if len(dims) == 1 else dims)
             inputs = OrderedDict((k, v) for k, v in self.inputs.items()
                                  if k not in reduced_vars)
             return Tensor(data, inputs, self.dtype)
@@ -322,13 +329,7 @@ class Tensor(Funsor, metaclass=TensorMeta):
             flat_sample = dist.CategoricalLogits.dist_class(logits=flat_logits).sample(*sample_args)
         else:  # default numpy backend
             assert backend == "numpy"
-            shape = sample_shape + flat_logits.shape[:-1]
-            logit_max = np.amax(flat_logits, -1, keepdims=True)
-            probs = np.exp(flat_logits - logit_max)
-            probs = probs / np.sum(probs, -1, keepdims=True)
-            s = np.cumsum(probs, -1)
-            r = np.random.rand(*shape)
-            flat_sample = np.sum(s < np.expand_dims(r, -1), axis=-1)
+            flat_sample = _numpy_categorical_sample(flat_logits, sample_shape, rng_key)
 
         assert flat_sample.shape == sample_shape + batch_shape
         results = []
@@ -456,6 +457,35 @@ def tensor_to_funsor(x, output=None, dim_to_name=None):
         return Tensor(x, packed_inputs, dtype=output.dtype)
 
 
+def _numpy_categorical_sample(logits, sample_shape, rng=None):
+    """
+    Draws categorical samples by inverse-CDF search along the rightmost dim
+    of ``logits``, vectorized over batches by offsetting each batch's CDF.
+
+    :param np.ndarray logits: An array of unnormalized log probabilities.
+    :param tuple sample_shape: The shape of samples to draw per batch element.
+    :param rng: An optional :class:`np.random.Generator` or
+        :class:`np.random.RandomState`. Other values, e.g. JAX PRNG keys,
+        fall back to the global random state.
+    """
+    batch_shape, size = logits.shape[:-1], logits.shape[-1]
+    num_batches = int(np.prod(batch_shape))
+    cdf = np.cumsum(np.exp(logits - np.amax(logits, -1, keepdims=True)), -1)
+    cdf = cdf / cdf[..., -1:]
+    offset = np.arange(num_batches).reshape(batch_shape)
+    shape = sample_shape + batch_shape
+    if isinstance(rng, (getattr(np.random, "Generator", ()), np.random.RandomState)):
+        r = rng.random(shape)
+    else:
+        r = np.random.rand(*shape)
+    cdf = cdf + offset[..., None]
+    # Clip each draw below its batch's total, which may round up past the
+    # total or onto a trailing zero-probability category.
+    u = np.minimum(r + offset, np.nextafter(cdf[..., -1], -np.inf))
+    index = np.searchsorted(cdf.reshape(-1), u, side="right")
+    return index - offset * size
+
+
 def align_tensor(new_inputs, x, expand=False):
     r"""
     Permute and add dims to a tensor to match desired ``new_inputs``.
@@ -481,19 +511,46 @@ def align_tensor(new_inputs, x, expand=False):
     if old_inputs == new_inputs:
         return data
 
+    permutation, shape, expand_shape = _alignment_plan(
+        tuple(old_inputs.items()), tuple(new_inputs.items()), x.output.shape, expand)
+    if permutation is not None:
+        data = ops.permute(data, permutation)
+    if shape is not None:
+        data = data.reshape(shape)
+    if expand_shape is not None:
+        data = ops.expand(data, expand_shape)
+    return data
+
+
+@functools.lru_cache(maxsize=4096)
+def _alignment_plan(old_inputs, new_inputs, output_shape, expand):
+    """
+    Computes the permutation, reshape and expand steps of
+    :func:`align_tensor` . Each step is ``None`` if it would be a no-op.
+    """
+    old_keys = tuple(k for k, d in old_inputs)
+    new_keys = tuple(k for k, d in new_inputs)
+    old_sizes = dict(old_inputs)
+    event_dims = tuple(range(len(old_keys), len(old_keys) + len(output_shape)))
+
     # Permute squashed input dims.
-    x_keys = tuple(old_inputs)
-    data = ops.permute(data, tuple(x_keys.index(k) for k in new_inputs if k in old_inputs) +
-                       tuple(range(len(old_inputs), len(data.shape))))
+    permutation = tuple(old_keys.index(k) for k in new_keys if k in old_sizes) + event_dims
+    if permutation == tuple(range(len(permutation))):
+        permutation = None
 
     # Unsquash multivariate input dims by filling in ones.
-    data = data.reshape(tuple(old_inputs[k].dtype if k in old_inputs else 1 for k in new_inputs) +
-                        x.output.shape)
+    shape = tuple(old_sizes[k].dtype if k in old_sizes else 1 for k in new_keys) + output_shape
+    if len(shape) == len(old_keys) + len(output_shape):
+        shape = None
 
-    # Optionally expand new dims.
+    # Optionally expand new dims, as a broadcast view rather than a copy.
+    expand_shape = None
     if expand:
-        data = ops.expand(data, tuple(d.dtype for d in new_inputs.values()) + x.output.shape)
-    return data
+        expand_shape = tuple(d.dtype for k, d in new_inputs) + output_shape
+        if shape is None:
+            expand_shape = None
+
+    return permutation, shape, expand_shape
 
 
 def align_tensors(*args, **kwargs):
@@ -15,6 +15,7 @@ from multipledispatch.variadic import Variadic, isvariadic
 
 import funsor.interpreter as interpreter
 import funsor.ops as ops
+import funsor.registry as registry
 from funsor.domains import Domain, bint, find_domain, reals
 from funsor.interpreter import PatternMissingError, dispatched_interpretation, interpret
 from funsor.ops import AssociativeOp, GetitemOp, Op
@@ -22,12 +23,31 @@ from funsor.util import getargspec, lazy_property, pretty, quote
 
 
 def substitute(expr, subs):
+    """
+    Substitutes funsors for free variables in an expression, reinterpreting
+    it under the current interpretation. Subexpressions shared within
+    ``expr`` are substituted only once.
+
+    Subexpressions whose inputs contain none of the substituted names are
+    returned as-is when reinterpreting them cannot change them, i.e. when
+    they are leaves like :class:`~funsor.tensor.Tensor` or when the current
+    interpretation is :func:`lazy` or :func:`reflect` .
+
+    :param expr: A funsor or data structure holding funsors.
+    :param subs: A dict or tuple of ``(name, value)`` pairs, where each
+        ``value`` is a :class:`Funsor` .
+    :return: The substituted expression.
+    """
     if isinstance(subs, (dict, OrderedDict)):
         subs = tuple(subs.items())
     assert isinstance(subs, tuple)
     assert all(isinstance(v, Funsor) for k, v in subs)
+    names = frozenset(k for k, v in subs)
+
+    base = interpreter.get_interpretation()
+    prune_subtrees = base is lazy or base is reflect
 
-    @interpreter.interpretation(interpreter._INTERPRETATION)  # use base
+    @interpreter.interpretation(base)
     def subs_interpreter(cls, *args):
         expr = cls(*args)
         fresh_subs = tuple((k, v) for k, v in subs if k in expr.fresh)
@@ -35,8 +55,12 @@ def substitute(expr, subs):
             expr = interpreter.debug_logged(expr.eager_subs)(fresh_subs)
         return expr
 
+    def prune(x):
+        return (isinstance(x, Funsor) and names.isdisjoint(x.inputs) and
+                (prune_subtrees or all(map(interpreter.is_atom, x._ast_values))))
+
     with interpreter.interpretation(subs_interpreter):
-        return interpreter.reinterpret(expr)
+        return interpreter.reinterpret(expr, prune)
 
 
 def _alpha_mangle(expr):
@@ -71,11 +95,17 @@ def reflect(cls, *args, **kwargs):
     if cache_key in cls._cons_cache:
         return cls._cons_cache[cache_key]
 
-    arg_types = tuple(typing.Tuple[tuple(map(type, arg))]
-                      if (type(arg) is tuple and all(isinstance(a, Funsor) for a in arg))
-                      else typing.Tuple if (type(arg) is tuple and not arg)
-                      else type(arg) for arg in args)
-    cls_specific = (cls.__origin__ if cls.__args__ else cls)[arg_types]
+    # Look up the parametric subtype by raw arg types, avoiding typing.Tuple.
+    raw_types = tuple(tuple(map(type, arg)) if type(arg) is tuple else type(arg) for arg in args)
+    try:
+        cls_specific = cls._raw_type_cache[raw_types]
+    except KeyError:
+        arg_types = tuple(typing.Tuple[tuple(map(type, arg))]
+                          if (type(arg) is tuple and all(isinstance(a, Funsor) for a in arg))
+                          else typing.Tuple if (type(arg) is tuple and not arg)
+                          else type(arg) for arg in args)
+        cls_specific = (cls.__origin__ if cls.__args__ else cls)[arg_types]
+        cls._raw_type_cache[raw_types] = cls_specific
     result = super(FunsorMeta, cls_specific).__call__(*args)
     result._ast_values = args
 
@@ -89,7 +119,7 @@ def reflect(cls, *args, **kwargs):
 @dispatched_interpretation
 def normalize(cls, *args):
 
-    result = normalize.dispatch(cls, *args)(*args)
+    result = _normalize_dispatch(cls, *args)
     if result is None:
         result = reflect(cls, *args)
 
@@ -101,7 +131,7 @@ def lazy(cls, *args):
     """
     Substitute eagerly but perform ops lazily.
     """
-    result = lazy.dispatch(cls, *args)(*args)
+    result = _lazy_dispatch(cls, *args)
     if result is None:
         result = reflect(cls, *args)
     return result
@@ -112,9 +142,7 @@ def eager(cls, *args):
     """
     Eagerly execute ops with known implementations.
     """
-    result = eager.dispatch(cls, *args)(*args)
-    if result is None:
-        result = normalize.dispatch(cls, *args)(*args)
+    result = _eager_dispatch(cls, *args)
     if result is None:
         result = reflect(cls, *args)
     return result
@@ -129,7 +157,7 @@ def eager_or_die(cls, *args):
 
     :raises: :py:class:`NotImplementedError` no pattern is found.
     """
-    result = eager.dispatch(cls, *args)(*args)
+    result = _eager_only_dispatch(cls, *args)
     if result is None:
         if cls in (Subs, Unary, Binary, Reduce):
             raise NotImplementedError("Missing pattern for {}({})".format(
@@ -144,11 +172,7 @@ def sequential(cls, *args):
     Eagerly execute ops with known implementations; additonally execute
     vectorized ops sequentially if no known vectorized implementation exists.
     """
-    result = sequential.dispatch(cls, *args)(*args)
-    if result is None:
-        result = eager.dispatch(cls, *args)(*args)
-    if result is None:
-        result = normalize.dispatch(cls, *args)(*args)
+    result = _sequential_dispatch(cls, *args)
     if result is None:
         result = reflect(cls, *args)
     return result
@@ -160,17 +184,21 @@ def moment_matching(cls, *args):
     A moment matching interpretation of :class:`Reduce` expressions. This falls
     back to :class:`eager` in other cases.
     """
-    result = moment_matching.dispatch(cls, *args)(*args)
-    if result is None:
-        result = eager.dispatch(cls, *args)(*args)
-    if result is None:
-        result = normalize.dispatch(cls, *args)(*args)
+    result = _moment_matching_dispatch(cls, *args)
     if result is None:
         result = reflect(cls, *args)
     return result
 
 
-interpreter.set_interpretation(eager)  # Use eager interpretation by default.
+# Each interpretation falls back through a chain of pattern registries.
+_normalize_dispatch = interpreter.dispatch_chain(normalize)
+_lazy_dispatch = interpreter.dispatch_chain(lazy)
+_eager_dispatch = interpreter.dispatch_chain(eager, normalize)
+_eager_only_dispatch = interpreter.dispatch_chain(eager, name="eager_or_die")
+_sequential_dispatch = interpreter.dispatch_chain(sequential, eager, normalize)
+_moment_matching_dispatch = interpreter.dispatch_chain(moment_matching, eager, normalize)
+
+interpreter._DEFAULT_INTERPRETATION = eager  # Use eager interpretation by default.
 
 
 class FunsorMeta(type):
@@ -206,6 +234,7 @@ class FunsorMeta(type):
             cls._ast_fields = getargspec(cls.__init__)[0][1:]
             cls._cons_cache = WeakValueDictionary()
             cls._type_cache = WeakValueDictionary()
+            cls._raw_type_cache = WeakValueDictionary()
 
     def __call__(cls, *args, **kwargs):
         if cls.__args__:
@@ -231,7 +260,10 @@ class FunsorMeta(type):
             assert not cls.__args__, "cannot subscript a subscripted type {}".format(cls)
             assert len(arg_types) == len(cls._ast_fields), "must provide types for all params"
             new_dct = cls.__dict__.copy()
-            new_dct.update({"__args__": arg_types})
+            # Slots are inherited from cls rather than redeclared.
+            for name in new_dct.pop("__slots__", ()):
+                new_dct.pop(name, None)
+            new_dct.update({"__args__": arg_types, "__slots__": ()})
             # type(cls) to handle FunsorMeta subclasses
             cls._type_cache[arg_types] = type(cls)(cls.__name__, (cls,), new_dct)
         return cls._type_cache[arg_types]
@@ -314,6 +346,69 @@ def _convert_reduced_vars(reduced_vars):
                      for var in reduced_vars)
 
 
+class _FrozenInputs(OrderedDict):
+    """
+    Immutable :class:`~collections.OrderedDict` of inputs with a precomputed
+    hash. Instances are interned by :func:`_intern_inputs`, so that funsors
+    with equal inputs share a single mapping. :meth:`copy` returns a mutable
+    :class:`~collections.OrderedDict` .
+    """
+    __slots__ = ("_hash",)
+
+    def __init__(self, *args, **kwargs):
+        raise TypeError("use _intern_inputs() to construct inputs")
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("inputs are immutable; use .copy() to get a mutable OrderedDict")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = move_to_end = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return repr(OrderedDict(self))
+
+    def __reduce__(self):
+        return _intern_inputs, (OrderedDict(self),)
+
+    def copy(self):
+        return OrderedDict(self)
+
+
+# Interned inputs, keyed by the hash of their names. Names are strings whose
+# hashes are cached, so this key is much cheaper than hashing the domains.
+# Mappings whose names collide with a live entry are simply not interned.
+_INPUTS_CACHE = WeakValueDictionary()
+_setitem = OrderedDict.__setitem__
+
+
+def _intern_inputs(*parts):
+    """
+    Returns the unique :class:`_FrozenInputs` equal to the union of
+    ``parts`` , merged in order as by :meth:`OrderedDict.update` .
+
+    :param OrderedDict parts: Mappings from input name to domain.
+    :rtype: _FrozenInputs
+    """
+    result = OrderedDict.__new__(_FrozenInputs)
+    for part in parts:
+        # Interned parts were validated when they were first interned.
+        if type(part) is not _FrozenInputs:
+            assert all(map(isinstance, part, itertools.repeat(str)))
+            assert all(map(isinstance, part.values(), itertools.repeat(Domain)))
+        for name, input_ in part.items():
+            _setitem(result, name, input_)
+    key = hash(tuple(result))
+    cached = _INPUTS_CACHE.get(key)
+    if cached is not None and OrderedDict.__eq__(cached, result):
+        return cached
+    result._hash = key
+    _INPUTS_CACHE.setdefault(key, result)
+    return result
+
+
 class Funsor(object, metaclass=FunsorMeta):
     """
     Abstract base class for immutable functional tensors.
@@ -331,18 +426,19 @@ class Funsor(object, metaclass=FunsorMeta):
         free variables to domains.
     :param Domain output: An output domain.
     """
+    # Core terms declare __slots__ to save memory in large lazy graphs.
+    # The _affine_inputs slot caches funsor.affine.affine_inputs().
+    __slots__ = ("inputs", "output", "fresh", "bound", "_ast_values", "_affine_inputs", "__weakref__")
+
     def __init__(self, inputs, output, fresh=None, bound=None):
         fresh = frozenset() if fresh is None else fresh
         bound = frozenset() if bound is None else bound
         assert isinstance(inputs, OrderedDict)
-        for name, input_ in inputs.items():
-            assert isinstance(name, str)
-            assert isinstance(input_, Domain)
         assert isinstance(output, Domain)
         assert isinstance(fresh, frozenset)
         assert isinstance(bound, frozenset)
         super(Funsor, self).__init__()
-        self.inputs = inputs
+        self.inputs = inputs if type(inputs) is _FrozenInputs else _intern_inputs(inputs)
         self.output = output
         self.fresh = fresh
         self.bound = bound
@@ -467,8 +563,9 @@ class Funsor(object, metaclass=FunsorMeta):
         :param OrderedDict sample_inputs: An optional mapping from variable
             name to :class:`~funsor.domains.Domain` over which samples will
             be batched.
-        :param rng_key: a PRNG state to be used by JAX backend to generate random samples
-        :type rng_key: None or JAX's random.PRNGKey
+        :param rng_key: a PRNG state to be used by JAX backend to generate random samples,
+            or a NumPy random generator to be used by NumPy backend
+        :type rng_key: None, JAX's random.PRNGKey, or np.random.Generator
         """
         assert self.output == reals()
         sampled_vars = _convert_reduced_vars(sampled_vars)
@@ -773,6 +870,9 @@ def to_funsor(x, output=None, dim_to_name=None, **kwargs):
     :rtype: Funsor
     :raises: ValueError
     """
+    # Conversions may be registered by modules whose import is deferred.
+    if registry.import_deferred():
+        return to_funsor(x, output, dim_to_name, **kwargs)
     raise ValueError("Cannot convert to Funsor: {}".format(repr(x)))
 
 
@@ -815,6 +915,8 @@ class Variable(Funsor):
     :param str name: A variable name.
     :param funsor.domains.Domain output: A domain.
     """
+    __slots__ = ("name",)
+
     def __init__(self, name, output):
         inputs = OrderedDict([(name, output)])
         fresh = frozenset({name})
@@ -858,6 +960,8 @@ class Subs(Funsor, metaclass=SubsMeta):
         string and ``value`` can be coerced to a :class:`Funsor` via
         :func:`to_funsor`.
     """
+    __slots__ = ("arg", "subs")
+
     def __init__(self, arg, subs):
         assert isinstance(arg, Funsor)
         assert isinstance(subs, tuple)
@@ -928,6 +1032,8 @@ class Unary(Funsor):
     :param ~funsor.ops.Op op: A unary operator.
     :param Funsor arg: An argument.
     """
+    __slots__ = ("op", "arg")
+
     def __init__(self, op, arg):
         assert callable(op)
         assert isinstance(arg, Funsor)
@@ -971,12 +1077,19 @@ class Binary(Funsor):
     :param Funsor lhs: A left hand side argument.
     :param Funsor rhs: A right hand side argument.
     """
+    __slots__ = ("op", "lhs", "rhs")
+
     def __init__(self, op, lhs, rhs):
         assert callable(op)
         assert isinstance(lhs, Funsor)
         assert isinstance(rhs, Funsor)
-        inputs = lhs.inputs.copy()
-        inputs.update(rhs.inputs)
+        # Share the interned inputs of an argument rather than building a copy.
+        if rhs.inputs.keys() <= lhs.inputs.keys():
+            inputs = lhs.inputs
+        elif not lhs.inputs:
+            inputs = rhs.inputs
+        else:
+            inputs = _intern_inputs(lhs.inputs, rhs.inputs)
         output = find_domain(op, lhs.output, rhs.output)
         super(Binary, self).__init__(inputs, output)
         self.op = op
@@ -997,6 +1110,8 @@ class Reduce(Funsor):
     :param funsor arg: An argument to be reduced.
     :param frozenset reduced_vars: A set of variable names over which to reduce.
     """
+    __slots__ = ("op", "arg", "reduced_vars")
+
     def __init__(self, op, arg, reduced_vars):
         assert callable(op)
         assert isinstance(arg, Funsor)
@@ -1054,6 +1169,8 @@ class Number(Funsor, metaclass=NumberMeta):
     :param numbers.Number data: A python number.
     :param dtype: A nonnegative integer or the string "real".
     """
+    __slots__ = ("data",)
+
     def __init__(self, data, dtype=None):
         assert isinstance(data, numbers.Number)
         if isinstance(dtype, int):
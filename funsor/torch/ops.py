@@ -21,26 +21,62 @@ ops.transpose.register(torch.Tensor, int, int)(torch.transpose)
 ops.unsqueeze.register(torch.Tensor, int)(torch.unsqueeze)
 
 
+def _reduce_dims(reduce_dim, x, dims):
+    # Fallback for torch reductions that accept only a single dim.
+    for dim in sorted(dims, reverse=True):
+        x = reduce_dim(x, dim)
+    return x
+
+
 @ops.all.register(torch.Tensor, (int, type(None)))
 def _all(x, dim):
     return x.all() if dim is None else x.all(dim=dim)
 
 
+@ops.all.register(torch.Tensor, tuple)
+def _all(x, dim):
+    return _reduce_dims(ops.all, x, dim)
+
+
 @ops.amax.register(torch.Tensor, (int, type(None)))
 def _amax(x, dim, keepdims=False):
     return x.max() if dim is None else x.max(dim, keepdims)[0]
 
 
+@ops.amax.register(torch.Tensor, tuple)
+def _amax(x, dim, keepdims=False):
+    if hasattr(torch, "amax"):
+        return torch.amax(x, dim, keepdims)
+    return _reduce_dims(lambda x, d: x.max(d, keepdims)[0], x, dim)
+
+
 @ops.amin.register(torch.Tensor, (int, type(None)))
 def _amin(x, dim, keepdims=False):
     return x.min() if dim is None else x.min(dim, keepdims)[0]
 
 
+@ops.amin.register(torch.Tensor, tuple)
+def _amin(x, dim, keepdims=False):
+    if hasattr(torch, "amin"):
+        return torch.amin(x, dim, keepdims)
+    return _reduce_dims(lambda x, d: x.min(d, keepdims)[0], x, dim)
+
+
 @ops.any.register(torch.Tensor, (int, type(None)))
 def _any(x, dim):
     return x.any() if dim is None else x.any(dim=dim)
 
 
+@ops.any.register(torch.Tensor, tuple)
+def _any(x, dim):
+    return _reduce_dims(ops.any, x, dim)
+
+
+@ops.argmax.register(torch.Tensor, int)
+def _argmax(x, dim):
+    return x.argmax(dim)
+
+
 @ops.astype.register(torch.Tensor, str)
 def _astype(x, dtype):
     return x.type(getattr(torch, dtype))
@@ -111,7 +147,7 @@ def _log(x):
     return x.log()
 
 
-@ops.logsumexp.register(torch.Tensor, (int, type(None)))
+@ops.logsumexp.register(torch.Tensor, (int, tuple, type(None)))
 def _logsumexp(x, dim):
     return x.reshape(-1).logsumexp(0) if dim is None else x.logsumexp(dim)
 
@@ -188,6 +224,11 @@ def _prod(x, dim):
     return x.prod() if dim is None else x.prod(dim=dim)
 
 
+@ops.prod.register(torch.Tensor, tuple)
+def _prod(x, dim):
+    return _reduce_dims(ops.prod, x, dim)
+
+
 @ops.reciprocal.register(torch.Tensor)
 def _reciprocal(x):
     result = x.reciprocal().clamp(max=torch.finfo(x.dtype).max)
@@ -217,7 +258,7 @@ def _stack(dim, *x):
     return torch.stack(x, dim=dim)
 
 
-@ops.sum.register(torch.Tensor, (int, type(None)))
+@ops.sum.register(torch.Tensor, (int, tuple, type(None)))
 def _sum(x, dim):
     return x.sum() if dim is None else x.sum(dim)
 
@@ -1,15 +1,20 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
+import contextvars
 import functools
 import inspect
 import re
 import os
+from contextlib import contextmanager
 
 import numpy as np
 
-_FUNSOR_BACKEND = os.environ.get("FUNSOR_BACKEND", "numpy")
-_JAX_LOADED = True if _FUNSOR_BACKEND == "jax" else False
+# The backend is process-wide, set by set_backend(). A thread or asyncio task
+# can temporarily override it with the backend() context manager.
+_DEFAULT_BACKEND = os.environ.get("FUNSOR_BACKEND", "numpy")
+_FUNSOR_BACKEND = contextvars.ContextVar("funsor_backend", default=None)
+_JAX_LOADED = True if _DEFAULT_BACKEND == "jax" else False
 
 
 class lazy_property(object):
@@ -158,29 +163,57 @@ def set_backend(backend):
     `numpy` backend because we dispatch to using `jax.numpy` all ops with
     `numpy.ndarray` or `numpy.generic` inputs.
 
+    The backend is set for all threads and :mod:`asyncio` tasks, except
+    those inside a :func:`backend` block.
+
     :param str backend: either "numpy", "torch", or "jax".
     """
-    global _FUNSOR_BACKEND, _JAX_LOADED
+    global _DEFAULT_BACKEND
+
+    _check_backend(backend)
+    _DEFAULT_BACKEND = backend
+    _import_backend(backend)
+
+
+@contextmanager
+def backend(name):
+    """
+    Context manager to override the backend of the current thread or
+    :mod:`asyncio` task, e.g.::
+
+        with funsor.util.backend("torch"):
+            ...
+
+    :param str name: either "numpy", "torch", or "jax".
+    """
+    _check_backend(name)
+    token = _FUNSOR_BACKEND.set(name)
+    try:
+        _import_backend(name)
+        yield
+    finally:
+        _FUNSOR_BACKEND.reset(token)
 
-    if backend == "numpy":
-        if _JAX_LOADED:
-            raise ValueError("Cannot revert back to NumPy backend when JAX backend has been set.")
-        else:
-            _FUNSOR_BACKEND = "numpy"
-    elif backend == "torch":
-        _FUNSOR_BACKEND = "torch"
 
+def _check_backend(backend):
+    if backend not in ("numpy", "torch", "jax"):
+        raise ValueError("backend should be either 'numpy', 'torch', or 'jax'"
+                         ", got {}".format(backend))
+    if backend == "numpy" and _JAX_LOADED:
+        raise ValueError("Cannot revert back to NumPy backend when JAX backend has been set.")
+
+
+def _import_backend(backend):
+    global _JAX_LOADED
+
+    if backend == "torch":
         import torch  # noqa: F401
         import funsor.torch  # noqa: F401
     elif backend == "jax":
-        _FUNSOR_BACKEND = "jax"
         _JAX_LOADED = True
 
         import jax  # noqa: F401
         import funsor.jax  # noqa: F401
-    else:
-        raise ValueError("backend should be either 'numpy', 'torch', or 'jax'"
-                         ", got {}".format(backend))
 
 
 def get_backend():
@@ -190,11 +223,12 @@ def get_backend():
     :return: either "numpy", "torch", or "jax".
     :rtype: str
     """
-    return _FUNSOR_BACKEND
+    override = _FUNSOR_BACKEND.get()
+    return _DEFAULT_BACKEND if override is None else override
 
 
 def get_tracing_state():
-    if _FUNSOR_BACKEND == "torch":
+    if get_backend() == "torch":
         import torch
 
         return torch._C._get_tracing_state()
@@ -203,7 +237,7 @@ def get_tracing_state():
 
 
 def is_nn_module(x):
-    if _FUNSOR_BACKEND == "torch":
+    if get_backend() == "torch":
         import torch
 
         return isinstance(x, torch.nn.Module)
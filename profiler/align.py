@@ -0,0 +1,57 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures eager evaluation of long chains of ``Tensor + Tensor`` whose
+operands have differing input orders, which exercises
+:func:`~funsor.tensor.align_tensor` . Run e.g.::
+
+    python profiler/align.py --length 1000 --num-inputs 4
+"""
+
+import argparse
+import itertools
+import timeit
+from collections import OrderedDict
+from functools import reduce
+
+import numpy as np
+
+import funsor.ops as ops
+from funsor.domains import bint
+from funsor.tensor import Tensor, _alignment_plan
+
+
+def make_operands(length, num_inputs, size):
+    names = ["i{}".format(i) for i in range(num_inputs)]
+    orders = list(itertools.permutations(names))
+    operands = []
+    for n in range(length):
+        # Vary both the order and the subset of inputs.
+        order = orders[n % len(orders)][:num_inputs - n % 2]
+        inputs = OrderedDict((k, bint(size)) for k in order)
+        operands.append(Tensor(np.random.randn(*(size,) * len(inputs)), inputs))
+    return operands
+
+
+def main(args):
+    operands = make_operands(args.length, args.num_inputs, args.size)
+
+    def chain():
+        return reduce(ops.add, operands)
+
+    t = min(timeit.repeat(chain, number=args.number, repeat=args.repeat)) / args.number
+    print("chain of {} additions: {:0.3g}ms ({:0.3g}us per op)".format(
+        args.length - 1, 1e3 * t, 1e6 * t / (args.length - 1)))
+    print(_alignment_plan.cache_info())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tensor alignment benchmark")
+    parser.add_argument("-l", "--length", default=1000, type=int)
+    parser.add_argument("-i", "--num-inputs", default=4, type=int)
+    parser.add_argument("-s", "--size", default=3, type=int)
+    parser.add_argument("-n", "--number", default=10, type=int)
+    parser.add_argument("-r", "--repeat", default=3, type=int)
+    args = parser.parse_args()
+    main(args)
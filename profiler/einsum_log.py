@@ -0,0 +1,61 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compares blocked and unblocked evaluation of
+:func:`funsor.einsum.numpy_log.einsum` on HMM-style chains
+``ab,bc,cd,...->`` of large transition matrices, reporting time and peak
+memory. Run e.g.::
+
+    python profiler/einsum_log.py --length 8 --size 1000 --memory-budget 8000000
+"""
+
+import argparse
+import os
+import timeit
+import tracemalloc
+
+import numpy as np
+import opt_einsum
+
+
+def hmm_chain(length, size, seed):
+    rng = np.random.RandomState(seed)
+    names = [opt_einsum.get_symbol(i) for i in range(length + 1)]
+    equation = ",".join(names[i] + names[i + 1] for i in range(length)) + "->"
+    # Scale logits so that the dynamic range differs between blocks.
+    operands = [rng.randn(size, size) * 20 for _ in range(length)]
+    return equation, operands
+
+
+def measure(fn):
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    time = min(timeit.repeat(fn, number=1, repeat=3))
+    return result, time, peak
+
+
+def main(args):
+    equation, operands = hmm_chain(args.length, args.size, args.seed)
+    expr = opt_einsum.contract_expression(equation, *(x.shape for x in operands))
+
+    def contract():
+        return expr(*operands, backend="funsor.einsum.numpy_log")
+
+    for name, memory_budget in [("unblocked", 0), ("blocked", args.memory_budget)]:
+        os.environ["FUNSOR_EINSUM_MEMORY_BUDGET"] = str(memory_budget)
+        result, time, peak = measure(contract)
+        print("{:>10}: {:0.3f} sec, peak memory {:0.1f} MB, result {:0.6g}".format(
+            name, time, peak / 2 ** 20, float(result)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="blocked log-space einsum benchmark")
+    parser.add_argument("-l", "--length", default=8, type=int)
+    parser.add_argument("-s", "--size", default=1000, type=int)
+    parser.add_argument("-m", "--memory-budget", default=8 * 10 ** 6, type=int, help="bytes")
+    parser.add_argument("--seed", default=0, type=int)
+    args = parser.parse_args()
+    main(args)
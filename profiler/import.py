@@ -0,0 +1,42 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures the wall time of ``import funsor`` in a fresh interpreter, and of
+the first dispatch, which imports the modules deferred by ``import funsor``.
+To compare two versions of funsor, run this script on both, e.g.::
+
+    python profiler/import.py --repeat 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+
+STATEMENTS = [
+    ("python", "pass"),
+    ("import", "import funsor"),
+    ("dispatch", "import funsor; funsor.Tensor(funsor.testing.randn(2)).exp()"),
+]
+
+
+def run(code, backend):
+    env = dict(os.environ, FUNSOR_BACKEND=backend)
+    subprocess.check_call([sys.executable, "-c", code], env=env)
+
+
+def main(args):
+    print("{:>10} {:>10} {:>10}".format("statement", "best", "median"))
+    for name, code in STATEMENTS:
+        times = sorted(timeit.repeat(lambda: run(code, args.backend), number=1, repeat=args.repeat))
+        print("{:>10} {:>8.1f}ms {:>8.1f}ms".format(name, 1e3 * times[0], 1e3 * times[len(times) // 2]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="import time benchmark")
+    parser.add_argument("-r", "--repeat", default=20, type=int)
+    parser.add_argument("-b", "--backend", default="numpy")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,79 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures the memory used by the nodes of a large lazy einsum graph. To
+compare two versions of funsor, run this script on both, e.g.::
+
+    python profiler/memory.py --num-operands 2000 --num-graphs 2
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from collections import OrderedDict
+
+import numpy as np
+
+from funsor.domains import bint
+from funsor.einsum import naive_einsum
+from funsor.interpreter import interpretation
+from funsor.tensor import Tensor
+from funsor.terms import Funsor, lazy
+
+
+def einsum_graph(num_operands, size, seed):
+    # A chain "ab,bc,cd,...->" using one unicode character per variable.
+    names = [chr(0x100 + i) for i in range(num_operands + 1)]
+    dims = [names[i] + names[i + 1] for i in range(num_operands)]
+    operands = [Tensor(np.random.RandomState(seed + i).randn(size, size),
+                       OrderedDict((d, bint(size)) for d in dim))
+                for i, dim in enumerate(dims)]
+    with interpretation(lazy):
+        return naive_einsum(",".join(dims) + "->", *operands, backend="numpy")
+
+
+def count_nodes(expr):
+    seen = set()
+    stack = [expr]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, (tuple, frozenset)):
+            stack.extend(x)
+        elif isinstance(x, Funsor) and id(x) not in seen:
+            seen.add(id(x))
+            stack.extend(x._ast_values)
+    return len(seen)
+
+
+def main(args):
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    start, _ = tracemalloc.get_traced_memory()
+    graphs = [einsum_graph(args.num_operands, args.size, i * args.num_operands)
+              for i in range(args.num_graphs)]
+    gc.collect()
+    end, peak = tracemalloc.get_traced_memory()
+    elapsed = time.perf_counter() - start_time
+    tracemalloc.stop()
+
+    num_nodes = sum(map(count_nodes, graphs))
+    print("nodes: {}".format(num_nodes))
+    print("construction time: {:0.3f} sec".format(elapsed))
+    print("retained memory: {:0.1f} MB ({:0.0f} bytes/node)".format(
+        (end - start) / 2 ** 20, (end - start) / num_nodes))
+    print("peak memory: {:0.1f} MB".format((peak - start) / 2 ** 20))
+    print("nodes with __dict__: {:0.1%}".format(
+        sum(hasattr(x, "__dict__") for x in gc.get_objects() if isinstance(x, Funsor)) /
+        max(1, sum(isinstance(x, Funsor) for x in gc.get_objects()))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="lazy einsum graph memory benchmark")
+    parser.add_argument("-n", "--num-operands", default=2000, type=int)
+    parser.add_argument("-g", "--num-graphs", default=2, type=int)
+    parser.add_argument("-s", "--size", default=2, type=int)
+    args = parser.parse_args()
+    main(args)
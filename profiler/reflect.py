@@ -0,0 +1,86 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Microbenchmark of :func:`~funsor.terms.reflect` on cons-hash misses, which
+must look up the parametric subtype of each new term. Run e.g.::
+
+    python profiler/reflect.py -n 10000
+"""
+
+import argparse
+import itertools
+import timeit
+import typing
+
+import numpy as np
+
+import funsor.ops as ops
+from funsor.cnf import Contraction, nullop
+from funsor.domains import reals
+from funsor.interpreter import interpretation
+from funsor.tensor import Tensor
+from funsor.terms import Binary, Funsor, Number, Variable, reflect
+
+
+def typing_lookup(cls, *args):
+    # The parametric subtype lookup performed by reflect() before caching.
+    arg_types = tuple(typing.Tuple[tuple(map(type, arg))]
+                      if (type(arg) is tuple and all(isinstance(a, Funsor) for a in arg))
+                      else typing.Tuple if (type(arg) is tuple and not arg)
+                      else type(arg) for arg in args)
+    return cls[arg_types]
+
+
+def main(args):
+    x = Variable('x', reals())
+    data = np.ones(3)
+    counter = itertools.count()
+
+    def fresh_number():
+        return reflect(Number, float(next(counter)), "real")
+
+    def fresh_binary():
+        return reflect(Binary, ops.add, x, reflect(Number, float(next(counter)), "real"))
+
+    def fresh_tensor():
+        return reflect(Tensor, data.copy(), (), "real")
+
+    def fresh_contraction():
+        return reflect(Contraction, nullop, ops.add, frozenset(), x,
+                       reflect(Number, float(next(counter)), "real"))
+
+    with interpretation(reflect):
+        print("{:>12} {:>12}".format("term", "reflect"))
+        for name, fn in [("Number", fresh_number), ("Binary", fresh_binary),
+                         ("Tensor", fresh_tensor), ("Contraction", fresh_contraction)]:
+            t = min(timeit.repeat(fn, number=args.number, repeat=args.repeat)) / args.number
+            print("{:>12} {:>10.3g}us".format(name, 1e6 * t))
+
+        print("\n{:>12} {:>12} {:>12}".format("lookup", "typing", "cached"))
+        y = Number(0.)
+        z = Tensor(data)
+        cases = [("Number", Number, (0., "real")),
+                 ("Binary", Binary, (ops.add, x, y)),
+                 ("Tensor", Tensor, (data, (), "real")),
+                 ("Contraction", Contraction, (nullop, ops.add, frozenset(), (x, z)))]
+        for name, cls, ast_values in cases:
+            cls_specific = type(reflect(cls, *ast_values))
+            assert typing_lookup(cls, *ast_values) is cls_specific
+            raw_types = tuple(tuple(map(type, arg)) if type(arg) is tuple else type(arg)
+                              for arg in ast_values)
+            assert cls._raw_type_cache[raw_types] is cls_specific
+            times = [min(timeit.repeat(fn, number=args.number, repeat=args.repeat)) / args.number
+                     for fn in [lambda: typing_lookup(cls, *ast_values),
+                                lambda: cls._raw_type_cache[tuple(
+                                    tuple(map(type, arg)) if type(arg) is tuple else type(arg)
+                                    for arg in ast_values)]]]
+            print("{:>12} {:>10.3g}us {:>10.3g}us".format(name, 1e6 * times[0], 1e6 * times[1]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="reflect microbenchmark")
+    parser.add_argument("-n", "--number", default=10000, type=int)
+    parser.add_argument("-r", "--repeat", default=3, type=int)
+    args = parser.parse_args()
+    main(args)
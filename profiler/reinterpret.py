@@ -0,0 +1,58 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compares :func:`~funsor.interpreter.recursion_reinterpret` and
+:func:`~funsor.interpreter.stack_reinterpret` on deep and wide lazy
+expressions. Run e.g.::
+
+    python profiler/reinterpret.py --depth 500 --width 2000
+"""
+
+import argparse
+import sys
+import timeit
+from functools import reduce
+
+import funsor.ops as ops
+from funsor.domains import reals
+from funsor.interpreter import interpretation, recursion_reinterpret, stack_reinterpret
+from funsor.terms import Number, Variable, lazy, reflect
+
+
+def deep_expr(depth):
+    with interpretation(lazy):
+        x = Number(0.)
+        for i in range(depth):
+            x = x + Variable('x_{}'.format(i % 10), reals())
+    return x
+
+
+def wide_expr(width):
+    with interpretation(lazy):
+        leaf = Variable('x', reals()).exp()
+        return reduce(ops.add, [leaf * Number(float(i % 10)) for i in range(width)])
+
+
+def main(args):
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * args.depth))
+    exprs = [("deep", deep_expr(args.depth)), ("wide", wide_expr(args.width))]
+    print("{:>6} {:>12} {:>12} {:>8}".format("expr", "recursion", "stack", "speedup"))
+    for name, expr in exprs:
+        times = []
+        for reinterpret in [recursion_reinterpret, stack_reinterpret]:
+            with interpretation(reflect):
+                times.append(min(timeit.repeat(lambda: reinterpret(expr),
+                                               number=args.number, repeat=args.repeat)) / args.number)
+        print("{:>6} {:>10.3g}ms {:>10.3g}ms {:>7.2f}x".format(
+            name, 1e3 * times[0], 1e3 * times[1], times[0] / times[1]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="reinterpret benchmark")
+    parser.add_argument("--depth", default=500, type=int)
+    parser.add_argument("--width", default=2000, type=int)
+    parser.add_argument("-n", "--number", default=10, type=int)
+    parser.add_argument("-r", "--repeat", default=3, type=int)
+    args = parser.parse_args()
+    main(args)
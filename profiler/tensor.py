@@ -0,0 +1,45 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures the throughput of :class:`~funsor.tensor.Tensor` and
+:class:`~funsor.domains.Domain` construction. To compare two versions of
+funsor, run this script on both, e.g.::
+
+    python profiler/tensor.py -n 10000
+"""
+
+import argparse
+import timeit
+from collections import OrderedDict
+
+import numpy as np
+
+from funsor.domains import bint, reals
+from funsor.tensor import Tensor
+
+
+def main(args):
+    inputs = OrderedDict([("i", bint(2)), ("j", bint(3))])
+    data = np.random.randn(2, 3, 4)
+
+    def fresh_tensor():
+        # The result is dropped and evicted from the weak cons cache, so each
+        # call constructs a new Tensor.
+        Tensor(data, inputs)
+
+    cases = [("reals(4)", lambda: reals(4)),
+             ("bint(3)", lambda: bint(3)),
+             ("Tensor", fresh_tensor)]
+    print("{:>10} {:>12} {:>14}".format("case", "time", "throughput"))
+    for name, fn in cases:
+        t = min(timeit.repeat(fn, number=args.number, repeat=args.repeat)) / args.number
+        print("{:>10} {:>10.3g}us {:>12.0f}/s".format(name, 1e6 * t, 1 / t))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tensor construction benchmark")
+    parser.add_argument("-n", "--number", default=10000, type=int)
+    parser.add_argument("-r", "--repeat", default=3, type=int)
+    args = parser.parse_args()
+    main(args)
@@ -34,6 +34,7 @@ setup(
     author_email='fritzo@uber.com',
     python_requires=">=3.6",
     install_requires=[
+        'contextvars;python_version<"3.7"',
         'makefun',
         'multipledispatch',
         'numpy>=1.7',
@@ -1,6 +1,8 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
+import itertools
+
 import pyro.distributions as dist
 import pytest
 import torch
@@ -140,6 +142,42 @@ def test_discrete_diag_normal_log_prob(init_shape, trans_shape, obs_shape, state
     check_expand(actual_dist, data)
 
 
+@pytest.mark.parametrize("num_steps", [1, 2, 3, 5])
+@pytest.mark.parametrize("batch_shape", [(), (2,)], ids=str)
+def test_discrete_sample_posterior(batch_shape, num_steps):
+    state_dim, obs_dim, num_samples = 2, 3, 20000
+    init_logits = torch.randn(batch_shape + (state_dim,))
+    trans_logits = torch.randn(num_steps, state_dim, state_dim)
+    obs_logits = torch.randn(num_steps, state_dim, obs_dim)
+    obs_dist = dist.Categorical(logits=obs_logits)
+    hmm = DiscreteHMM(init_logits, trans_logits, obs_dist)
+
+    data = torch.randint(obs_dim, batch_shape + (num_steps,))
+    log_prob = hmm.log_prob(data)
+    levels = hmm._scan_levels(data)
+    samples = hmm.sample_posterior(data, (num_samples,))
+    assert hmm._scan_levels(data) is levels
+    assert samples.shape == (num_samples,) + batch_shape + (num_steps,)
+
+    # Compute the posterior by enumerating all state sequences.
+    init = init_logits.log_softmax(-1)
+    trans = trans_logits.log_softmax(-1)
+    obs = obs_logits.log_softmax(-1)
+    joint = []
+    for x in itertools.product(range(state_dim), repeat=num_steps + 1):
+        logp = init[..., x[0]]
+        for t in range(num_steps):
+            logp = logp + trans[t, x[t], x[t + 1]] + obs[t, x[t + 1]][data[..., t]]
+        joint.append(logp)
+    joint = torch.stack(joint, -1)
+    assert_close(joint.logsumexp(-1), log_prob, atol=1e-4, rtol=1e-4)
+    expected = joint.softmax(-1).reshape(batch_shape + (state_dim, -1)).sum(-2)
+
+    codes = (samples * state_dim ** torch.arange(num_steps - 1, -1, -1)).sum(-1)
+    actual = torch.nn.functional.one_hot(codes, state_dim ** num_steps).float().mean(0)
+    assert_close(actual, expected, atol=0.02, rtol=0)
+
+
 @pytest.mark.parametrize("obs_dim,hidden_dim",
                          [(1, 1), (1, 2), (2, 1), (2, 2), (2, 3), (3, 2)])
 @pytest.mark.parametrize("init_shape,trans_mat_shape,trans_mvn_shape,obs_mat_shape,obs_mvn_shape", [
@@ -0,0 +1,80 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+import tracemalloc
+from collections import OrderedDict
+
+import pytest
+
+import funsor.ops as ops
+from funsor.chunked import chunked_interpretation
+from funsor.cnf import BACKEND_TO_EINSUM_BACKEND, BACKEND_TO_LOGSUMEXP_BACKEND, Contraction
+from funsor.domains import bint
+from funsor.einsum import einsum
+from funsor.interpreter import interpretation, reinterpret
+from funsor.tensor import Tensor
+from funsor.terms import lazy
+from funsor.testing import assert_close, make_einsum_example, random_tensor
+from funsor.util import get_backend
+
+EINSUM_EXAMPLES = [
+    ("a,b->", ''),
+    ("ab,a->", ''),
+    ("a,a->a", ''),
+    ("ab,bc,cd->da", ''),
+    ("ab,cd,bc->da", ''),
+    ("a,a,a,ab->ab", ''),
+    ('ai->', 'i'),
+    (',ai,abij->', 'ij'),
+    ('a,ai,bij->', 'ij'),
+    ('ai,abi,bci,cdi->', 'i'),
+    ('aij,abij,bcij->', 'ij'),
+    ('a,abi,bcij,cdij->', 'ij'),
+]
+
+
+@pytest.mark.parametrize('max_bytes', [1, 64, 1024])
+@pytest.mark.parametrize('equation,plates', EINSUM_EXAMPLES)
+@pytest.mark.parametrize('backend', [BACKEND_TO_EINSUM_BACKEND[get_backend()],
+                                     BACKEND_TO_LOGSUMEXP_BACKEND[get_backend()]])
+def test_einsum_chunked(equation, plates, backend, max_bytes):
+    inputs, outputs, sizes, operands, funsor_operands = make_einsum_example(equation, sizes=(3, 4))
+    expected = einsum(equation, *funsor_operands, plates=plates, backend=backend)
+    with chunked_interpretation(max_bytes):
+        actual = einsum(equation, *funsor_operands, plates=plates, backend=backend)
+    assert isinstance(actual, Tensor)
+    assert_close(actual, expected.align(tuple(actual.inputs)), atol=1e-4, rtol=1e-4)
+
+
+@pytest.mark.parametrize('bin_op', [ops.mul, ops.add], ids=str)
+def test_contraction_chunked_free_input(bin_op):
+    inputs = OrderedDict([("a", bint(5)), ("b", bint(4)), ("c", bint(3))])
+    x = random_tensor(OrderedDict((k, inputs[k]) for k in "ab"))
+    y = random_tensor(OrderedDict((k, inputs[k]) for k in "bc"))
+    with interpretation(lazy):
+        expr = Contraction(ops.nullop, bin_op, frozenset(), x, y)
+
+    expected = reinterpret(expr)
+    with chunked_interpretation(32):
+        actual = reinterpret(expr)
+    assert_close(actual, expected.align(tuple(actual.inputs)))
+
+
+@pytest.mark.skipif(get_backend() != "numpy", reason="tracemalloc only traces numpy arrays")
+def test_contraction_chunked_reduced_input_memory():
+    x = random_tensor(OrderedDict(a=bint(100), b=bint(64)))
+    y = random_tensor(OrderedDict(b=bint(64), c=bint(100)))
+    with interpretation(lazy):
+        expr = Contraction(ops.add, ops.mul, frozenset('b'), x, y)
+    output_bytes = 100 * 100 * x.data.itemsize
+
+    tracemalloc.start()
+    try:
+        with chunked_interpretation(2 * output_bytes):
+            actual = reinterpret(expr)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert_close(actual, reinterpret(expr).align(tuple(actual.inputs)))
+    # Chunks along b are folded into a running sum rather than all kept alive.
+    assert peak < 10 * output_bytes
@@ -3,12 +3,13 @@
 
 import itertools
 from collections import OrderedDict
+from functools import reduce
 
 import numpy as np  # noqa: F401
 import pytest
 
 from funsor import ops
-from funsor.cnf import Contraction, BACKEND_TO_EINSUM_BACKEND, BACKEND_TO_LOGSUMEXP_BACKEND
+from funsor.cnf import Contraction, BACKEND_TO_EINSUM_BACKEND, BACKEND_TO_LOGSUMEXP_BACKEND, _contract_expression
 from funsor.domains import bint  # noqa F403
 from funsor.domains import reals
 from funsor.einsum import einsum, naive_plated_einsum
@@ -102,3 +103,27 @@ def test_eager_contract_tensor_tensor(red_op, bin_op, x_inputs, x_shape, y_input
             expected = xy.reduce(red_op, reduced_vars)
             actual = Contraction(red_op, bin_op, reduced_vars, (x, y))
             assert_close(actual, expected, atol=1e-4, rtol=1e-3 if backend == "jax" else 1e-4)
+
+
+@pytest.mark.parametrize("event_shape", [(), (2,)], ids=str)
+@pytest.mark.parametrize("red_op,bin_op", [(ops.add, ops.mul), (ops.logaddexp, ops.add)], ids=str)
+def test_eager_contract_many_tensors(red_op, bin_op, event_shape):
+    backend = get_backend()
+    inputs = OrderedDict([("a", bint(2)), ("b", bint(3)), ("c", bint(4)), ("d", bint(5))])
+    names = ["ab", "bc", "cd", "da", "b"]
+    terms = [random_tensor(OrderedDict((k, inputs[k]) for k in name), reals(*event_shape))
+             for name in names]
+    reduced_vars = frozenset("abc")
+
+    expected = reduce(bin_op, terms).reduce(red_op, reduced_vars)
+    actual = Contraction(red_op, bin_op, reduced_vars, *terms)
+    assert isinstance(actual, Tensor)
+    assert_close(actual, expected, atol=1e-4, rtol=1e-3 if backend == "jax" else 1e-4)
+
+    # the contraction expression is reused for tensors of the same shapes
+    hits = _contract_expression.cache_info().hits
+    terms = [random_tensor(term.inputs, term.output) for term in terms]
+    expected = reduce(bin_op, terms).reduce(red_op, reduced_vars)
+    actual = Contraction(red_op, bin_op, reduced_vars, tuple(terms))
+    assert _contract_expression.cache_info().hits > hits
+    assert_close(actual, expected, atol=1e-4, rtol=1e-3 if backend == "jax" else 1e-4)
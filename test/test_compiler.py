@@ -0,0 +1,140 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+import funsor.ops as ops
+from funsor.compiler import _collect_leaves, compile_funsor
+from funsor.domains import bint, reals
+from funsor.einsum import naive_plated_einsum
+from funsor.interpreter import interpretation, reinterpret
+from funsor.optimizer import apply_optimizer
+from funsor.tensor import Tensor
+from funsor.terms import Number, Unary, lazy, normalize
+from funsor.testing import assert_close, make_einsum_example, random_tensor
+from funsor.util import get_backend
+
+pytestmark = pytest.mark.skipif(get_backend() != "numpy",
+                                reason="compile_funsor() only supports the numpy backend")
+
+assert bint  # flake8
+assert reals  # flake8
+assert random_tensor  # flake8
+
+X = "random_tensor(OrderedDict(i=bint(2), j=bint(3)))"
+Y = "random_tensor(OrderedDict(j=bint(3), k=bint(4)))"
+Z = "random_tensor(OrderedDict(k=bint(4)), reals(2))"
+
+EXPRS = [
+    "x.exp()",
+    "x + y",
+    "(x * y).reduce(ops.add, 'j')",
+    "(x + y).reduce(ops.logaddexp, frozenset(['j', 'k']))",
+    "((x + y).exp().reduce(ops.add, 'j') * z).reduce(ops.max, 'k')",
+    "(x * Number(2.) - y).reduce(ops.add, 'i')",
+    "(x + y)(k='l')(l=0)",
+    "((x + y).reduce(ops.logaddexp, 'i') + x.reduce(ops.logaddexp, 'i')).reduce(ops.min)",
+]
+
+
+def _new_operands(operands):
+    return [Tensor(np.random.randn(*x.data.shape), x.inputs, x.dtype) for x in operands]
+
+
+def _new_leaf_data(compiled, new_expr):
+    # Leaves of lazy expressions may be sliced or alpha converted, so take
+    # new data by position from the same expression built on new operands.
+    new_leaves = _collect_leaves(new_expr)
+    assert [x.data.shape for x in new_leaves] == [x.data.shape for x in compiled.leaves]
+    return [x.data for x in new_leaves]
+
+
+@pytest.mark.parametrize('expr', EXPRS)
+def test_compile_funsor(expr):
+    operands = [eval(spec) for spec in [X, Y, Z]]
+    with interpretation(lazy):
+        lazy_expr = eval(expr, globals(), dict(zip("xyz", operands)))
+    compiled = compile_funsor(lazy_expr)
+    assert compiled.num_ops > 0
+
+    # Replay on the traced data.
+    expected = reinterpret(lazy_expr)
+    assert_close(compiled(*compiled.leaves), expected)
+
+    # Replay on new data.
+    with interpretation(lazy):
+        new_expr = eval(expr, globals(), dict(zip("xyz", _new_operands(operands))))
+    expected = reinterpret(new_expr)
+    actual = compiled(*_new_leaf_data(compiled, new_expr))
+    assert_close(actual, expected.align(tuple(actual.inputs)))
+
+
+@pytest.mark.parametrize('equation,plates', [
+    ('a,ab,bc->c', ''),
+    ('ab,bc,cd->', ''),
+    ('i,ai,abi->', 'i'),
+])
+@pytest.mark.parametrize('backend', ['numpy', 'funsor.einsum.numpy_log'])
+def test_compile_optimized_einsum(equation, plates, backend):
+    inputs, outputs, sizes, operands, funsor_operands = make_einsum_example(equation)
+    with interpretation(normalize):
+        naive_ast = naive_plated_einsum(equation, *funsor_operands, plates=plates, backend=backend)
+    with interpretation(lazy):
+        optimized_ast = apply_optimizer(naive_ast)
+    compiled = compile_funsor(optimized_ast)
+    assert_close(compiled(*compiled.leaves), reinterpret(optimized_ast))
+
+    new_operands = _new_operands(funsor_operands)
+    with interpretation(normalize):
+        new_naive_ast = naive_plated_einsum(equation, *new_operands, plates=plates, backend=backend)
+    with interpretation(lazy):
+        new_optimized_ast = apply_optimizer(new_naive_ast)
+    expected = naive_plated_einsum(equation, *new_operands, plates=plates, backend=backend)
+    actual = compiled(*_new_leaf_data(compiled, new_optimized_ast))
+    assert_close(actual, expected.align(tuple(actual.inputs)))
+
+
+def test_compile_number():
+    with interpretation(lazy):
+        expr = Number(1.) + Number(2.)
+    compiled = compile_funsor(expr)
+    assert compiled.leaves == []
+    assert compiled() is Number(3.)
+
+
+@ops.Op
+def _abs_if_negative(x):
+    return -x if (x < 0).any() else x
+
+
+@ops.Op
+def _count_nonzero(x):
+    return x * np.count_nonzero(x)
+
+
+def test_compile_value_dependent_error():
+    x = random_tensor(OrderedDict(i=bint(3)))
+    with interpretation(lazy):
+        expr = Unary(_abs_if_negative, x.exp())
+    with pytest.raises(ValueError, match="depends on the values"):
+        compile_funsor(expr)
+
+
+def test_compile_dead_code():
+    x = random_tensor(OrderedDict(i=bint(3)))
+    with interpretation(lazy):
+        expr = (x.exp() * 0. + x).reduce(ops.add)
+    compiled = compile_funsor(expr)
+    assert compiled(np.ones(3)) is not None
+    assert_close(compiled(np.ones(3)).data, np.array(3.))
+
+
+def test_compile_python_int_error():
+    x = random_tensor(OrderedDict(i=bint(3)))
+    with interpretation(lazy):
+        expr = Unary(_count_nonzero, x)
+    with pytest.raises(ValueError, match="returns a Python int"):
+        compile_funsor(expr)
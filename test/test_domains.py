@@ -0,0 +1,43 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+import pickle
+
+import pytest
+
+from funsor.domains import Domain, bint, reals
+
+
+@pytest.mark.parametrize('make_domain', [
+    lambda: reals(),
+    lambda: reals(3, 2),
+    lambda: bint(4),
+    lambda: Domain((2,), 'real'),
+])
+def test_domains_are_interned(make_domain):
+    domain = make_domain()
+    assert make_domain() is domain
+    assert Domain(domain.shape, domain.dtype) is domain
+    assert pickle.loads(pickle.dumps(domain)) is domain
+    assert hash(domain) == hash((domain.shape, domain.dtype))
+
+
+def test_domain_cached_properties():
+    assert reals(2, 3).num_elements == 6
+    assert reals().num_elements == 1
+    assert bint(5).size == 5
+    with pytest.raises(AssertionError):
+        reals().size
+    with pytest.raises(AssertionError):
+        reals(2.5)
+
+
+def test_domain_validation_ignores_cache():
+    assert reals(2) is Domain((2,), 'real')
+    with pytest.raises(AssertionError):
+        Domain((2.0,), 'real')
+    assert bint(2) is Domain((), 2)
+    with pytest.raises(AssertionError):
+        bint(2.0)
+    with pytest.raises(ValueError):
+        Domain((), 2.0)
@@ -2,11 +2,14 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from collections import OrderedDict
+from functools import reduce
 
 import opt_einsum
 import pytest
 
 import funsor
+import funsor.einsum.numpy_log
+import funsor.einsum.numpy_map
 import funsor.ops as ops
 from funsor.cnf import BACKEND_TO_EINSUM_BACKEND, BACKEND_TO_LOGSUMEXP_BACKEND, BACKEND_TO_MAP_BACKEND
 from funsor.domains import bint
@@ -15,7 +18,7 @@ from funsor.interpreter import interpretation, reinterpret
 from funsor.optimizer import apply_optimizer
 from funsor.tensor import Tensor
 from funsor.terms import Variable, reflect
-from funsor.testing import assert_close, make_einsum_example
+from funsor.testing import assert_close, make_einsum_example, randn
 from funsor.util import get_backend
 
 EINSUM_EXAMPLES = [
@@ -65,6 +68,88 @@ def test_einsum(equation, backend):
             assert actual.inputs[output_dim].dtype == sizes[output_dim]
 
 
+@pytest.mark.parametrize('memory_budget', [1, 100, 1000])
+@pytest.mark.parametrize('equation', EINSUM_EXAMPLES + ["ab,bc,cd,de,ef->af", "ab,bc,cd->"])
+def test_einsum_log_blocked(equation, memory_budget):
+    inputs, outputs, sizes, operands, funsor_operands = make_einsum_example(equation, sizes=(5, 7))
+    # make the dynamic range differ across blocks
+    operands = [x * 10 for x in operands]
+    expected = funsor.einsum.numpy_log.einsum(equation, *operands)
+    actual = funsor.einsum.numpy_log.einsum(equation, *operands, memory_budget=memory_budget)
+    assert_close(actual, expected, atol=1e-4, rtol=1e-4)
+
+
+@pytest.mark.parametrize('memory_budget', [1, 100])
+@pytest.mark.parametrize('equation,shapes', [
+    ("aa,ab->b", [(5, 5), (5, 7)]),
+    ("aab,bc->c", [(5, 5, 7), (7, 3)]),
+    ("aa,a,ab->b", [(5, 5), (1,), (5, 7)]),
+])
+def test_einsum_log_blocked_repeated(equation, shapes, memory_budget):
+    operands = [randn(*shape) * 10 for shape in shapes]
+    expected = funsor.einsum.numpy_log.einsum(equation, *operands)
+    actual = funsor.einsum.numpy_log.einsum(equation, *operands, memory_budget=memory_budget)
+    assert_close(actual, expected, atol=1e-4, rtol=1e-4)
+
+
+def test_einsum_log_blocked_env(monkeypatch):
+    inputs, outputs, sizes, operands, funsor_operands = make_einsum_example("ab,bc->ac", sizes=(5, 7))
+    expected = funsor.einsum.numpy_log.einsum("ab,bc->ac", *operands)
+    monkeypatch.setenv("FUNSOR_EINSUM_MEMORY_BUDGET", "1")
+    actual = funsor.einsum.numpy_log.einsum("ab,bc->ac", *operands)
+    assert_close(actual, expected, atol=1e-4, rtol=1e-4)
+
+
+@pytest.mark.parametrize('equation', EINSUM_EXAMPLES + ["ab,bc,cd,de,ef->af", "ab,bc,cd->", "abc,bd,ce,a->e"])
+def test_einsum_map_backtrack(equation):
+    inputs, outputs, sizes, operands, funsor_operands = make_einsum_example(equation)
+    output = outputs[0]
+    contract_vars = frozenset().union(*inputs) - frozenset(output)
+    expected = reduce(ops.add, funsor_operands).reduce(ops.max, contract_vars)
+    expected = expected.align(tuple(output)).data
+
+    actual = funsor.einsum.numpy_map.einsum(equation, *operands)
+    assert_close(actual, expected)
+
+    actual, values = funsor.einsum.numpy_map.einsum(equation, *operands, backtrack=True)
+    assert_close(actual, expected)
+    assert set(values) == contract_vars
+    for i, dim in enumerate(output):
+        shape = tuple(sizes[dim] if j == i else 1 for j in range(len(output)))
+        values[dim] = ops.new_arange(actual, sizes[dim]).reshape(shape)
+    # the decoded assignment attains the maximum
+    total = sum(x[tuple(values[dim] for dim in dims)] for dims, x in zip(inputs, operands))
+    assert_close(total + actual * 0, actual)
+
+
+@pytest.mark.parametrize('equation,shapes', [
+    ("ab,bc->", [(2, 3), (1, 4)]),
+    ("ab,ab->a", [(2, 3), (2, 1)]),
+    ("ab,bc,cd->", [(2, 3), (3, 4), (1, 2)]),
+    ("ab,bc,cd->ad", [(2, 1), (3, 4), (1, 2)]),
+    ("ab,bc,cd,de->c", [(2, 3), (1, 4), (4, 1), (2, 2)]),
+])
+def test_einsum_map_backtrack_broadcast(equation, shapes):
+    inputs = equation.split('->')[0].split(',')
+    operands = [randn(shape) for shape in shapes]
+    sizes = {}
+    for dims, shape in zip(inputs, shapes):
+        for dim, size in zip(dims, shape):
+            sizes[dim] = max(size, sizes.get(dim, 1))
+    expanded = [ops.expand(x, tuple(sizes[dim] for dim in dims)) for dims, x in zip(inputs, operands)]
+    expected = funsor.einsum.numpy_map.einsum(equation, *expanded)
+
+    actual, values = funsor.einsum.numpy_map.einsum(equation, *operands, backtrack=True)
+    assert_close(actual, expected)
+    output = equation.split('->')[1]
+    for i, dim in enumerate(output):
+        shape = tuple(sizes[dim] if j == i else 1 for j in range(len(output)))
+        values[dim] = ops.new_arange(actual, sizes[dim]).reshape(shape)
+    # the decoded assignment attains the maximum
+    total = sum(x[tuple(values[dim] for dim in dims)] for dims, x in zip(inputs, expanded))
+    assert_close(total + actual * 0, actual)
+
+
 @pytest.mark.parametrize('equation', EINSUM_EXAMPLES)
 @pytest.mark.skipif(get_backend() == "numpy",
                     reason="funsor.distribution does not support numpy backend")
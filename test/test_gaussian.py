@@ -11,7 +11,7 @@ import pytest
 import funsor.ops as ops
 from funsor.cnf import Contraction, GaussianMixture
 from funsor.domains import bint, reals
-from funsor.gaussian import BlockMatrix, BlockVector, Gaussian
+from funsor.gaussian import BlockMatrix, BlockVector, Gaussian, gaussian_tensordot
 from funsor.integrate import Integrate
 from funsor.tensor import Einsum, Tensor, numeric_array
 from funsor.terms import Number, Variable
@@ -479,6 +479,22 @@ def test_reduce_logsumexp(int_inputs, real_inputs):
     assert_close(g_xy, g.reduce(ops.logaddexp, 'y').reduce(ops.logaddexp, 'x'), atol=1e-3, rtol=None)
 
 
+@pytest.mark.parametrize('reduced_vars', [
+    'w', 'x', 'z', 'wx', 'xy', 'yz', 'wz', 'wy', 'xz', 'wxz',
+])
+def test_reduce_logsumexp_blocks(reduced_vars):
+    inputs = OrderedDict([('i', bint(2)), ('w', reals(2)), ('x', reals(3)), ('y', reals()), ('z', reals(2, 2))])
+    g = random_gaussian(inputs)
+    reduced_vars = frozenset(reduced_vars)
+
+    actual = g.reduce(ops.logaddexp, reduced_vars)
+    assert frozenset(actual.inputs) == frozenset(inputs) - reduced_vars
+    # compare against the log normalizer, which does not slice blocks
+    real_vars = frozenset('wxyz')
+    assert_close(actual.reduce(ops.logaddexp, real_vars - reduced_vars),
+                 g.reduce(ops.logaddexp, real_vars), atol=1e-3, rtol=None)
+
+
 @pytest.mark.parametrize('int_inputs', [
     {},
     {'i': bint(2)},
@@ -551,3 +567,31 @@ def test_mc_plate_gaussian():
     res = Integrate(log_measure.sample('loc', rng_key=rng_key), integrand, 'loc')
     res = res.reduce(ops.mul, 'data')
     assert not ((res == float('inf')) | (res == float('-inf'))).any()
+
+
+@pytest.mark.parametrize('lhs_inputs,rhs_inputs', [
+    ("i,x,y", "y,z"),
+    ("x,y", "i,y,z"),
+    ("i,x,y", "j,y,z"),
+    ("y", "i,y,z"),
+    ("i,x,y", "y"),
+    ("i,y", "i,y"),
+    ("i,x,w,y", "i,j,w,y,z"),
+], ids=str)
+def test_gaussian_tensordot(lhs_inputs, rhs_inputs):
+    domains = {'i': bint(2), 'j': bint(3), 'w': reals(2), 'x': reals(3), 'y': reals(), 'z': reals(2)}
+    lhs = random_gaussian(OrderedDict((k, domains[k]) for k in lhs_inputs.split(',')))
+    rhs = random_gaussian(OrderedDict((k, domains[k]) for k in rhs_inputs.split(',')))
+    reduced_vars = frozenset(k for k in lhs.inputs if k in rhs.inputs and domains[k].dtype == 'real')
+
+    expected = (lhs + rhs).reduce(ops.logaddexp, reduced_vars)
+    actual = gaussian_tensordot(lhs, rhs, reduced_vars)
+    assert frozenset(actual.inputs) == frozenset(expected.inputs)
+    # Compare densities at a random point.
+    point = {k: random_tensor(OrderedDict(), d) for k, d in expected.inputs.items() if d.dtype == 'real'}
+    expected = expected(**point)
+    assert_close(actual(**point), expected.align(tuple(actual(**point).inputs)), atol=1e-4, rtol=1e-4)
+
+    # The Contraction pattern dispatches to gaussian_tensordot().
+    actual = Contraction(ops.logaddexp, ops.add, reduced_vars, lhs, rhs)(**point)
+    assert_close(actual, expected.align(tuple(actual.inputs)), atol=1e-4, rtol=1e-4)
@@ -3,8 +3,12 @@
 
 import glob
 import os
+import subprocess
+import sys
 from importlib import import_module
 
+import pytest
+
 from funsor import get_backend
 
 
@@ -23,3 +27,89 @@ def test_all_modules_are_imported():
         actual = getattr(import_module('funsor'), name)
         expected = import_module(f'funsor.{name}')
         assert actual == expected
+
+
+def _run_python(code):
+    env = dict(os.environ, FUNSOR_BACKEND="numpy")
+    return subprocess.check_output([sys.executable, "-c", code], env=env, universal_newlines=True,
+                                   timeout=60).split()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="lazy import requires Python 3.7")
+def test_import_is_lazy():
+    modules = _run_python("""
+import sys
+import funsor
+print(*sys.modules)
+""")
+    for name in ["funsor.cnf", "funsor.gaussian", "funsor.tensor", "funsor.terms", "makefun", "opt_einsum"]:
+        assert name not in modules
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="lazy import requires Python 3.7")
+def test_patterns_are_imported_on_first_dispatch():
+    output = _run_python("""
+import sys
+import numpy as np
+from funsor.tensor import Tensor
+print("funsor.cnf" in sys.modules)
+Tensor(np.ones(3)).exp()
+print("funsor.cnf" in sys.modules, type(Tensor(np.ones(3)).exp()).__name__)
+""")
+    assert output == ["False", "True", "Tensor"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="lazy import requires Python 3.7")
+def test_patterns_are_imported_on_concurrent_dispatch():
+    output = _run_python("""
+import threading
+import numpy as np
+from funsor.tensor import Tensor
+results = []
+def work():
+    results.append(type(Tensor(np.ones(3)).exp()).__name__)
+threads = [threading.Thread(target=work) for _ in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(*results)
+""")
+    assert output == ["Tensor"] * 8
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="lazy import requires Python 3.7")
+def test_deferred_modules_do_not_dispatch_on_import():
+    # import_deferred() relies on this to take _DEFERRED_LOCK before module locks.
+    output = _run_python("""
+import funsor.registry as registry
+calls = []
+import_deferred = registry.import_deferred
+registry.import_deferred = lambda: calls.append(None) or import_deferred()
+for name in tuple(registry._DEFERRED_MODULES):
+    __import__(name)
+print(len(calls))
+""")
+    assert output == ["0"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="lazy import requires Python 3.7")
+def test_patterns_are_imported_during_concurrent_plain_import():
+    output = _run_python("""
+import threading
+import numpy as np
+from funsor.tensor import Tensor
+results = []
+def dispatch():
+    results.append(type(Tensor(np.ones(3)).exp()).__name__)
+def plain_import():
+    import funsor.cnf
+    results.append(funsor.cnf.__name__)
+threads = [threading.Thread(target=dispatch), threading.Thread(target=plain_import)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(*sorted(results))
+""")
+    assert output == ["Tensor", "funsor.cnf"]
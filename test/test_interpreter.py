@@ -0,0 +1,263 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+
+import pytest
+
+import funsor.ops as ops
+from funsor.domains import bint, reals
+from funsor.interpreter import (
+    dispatch_chain,
+    dispatched_interpretation,
+    gensym,
+    get_interpretation,
+    interpretation,
+    recursion_reinterpret,
+    stack_reinterpret
+)
+from funsor.tensor import Tensor
+from funsor.montecarlo import _SAMPLE_INPUTS, _get_sample_inputs, monte_carlo, monte_carlo_interpretation
+from funsor.terms import Binary, Funsor, Number, Unary, Variable, eager, lazy, reflect
+from funsor.testing import assert_close, random_tensor
+from funsor.util import backend, get_backend
+
+assert bint  # flake8
+assert random_tensor  # flake8
+
+EXPRS = [
+    "Variable('x', bint(3))",
+    "Number(0.)",
+    "-Variable('x', reals())",
+    "Variable('x', reals()) + Variable('y', reals())",
+    "Variable('x', reals())(x=Number(0.))",
+    "(Variable('x', reals()) * Number(2.)).reduce(ops.logaddexp, frozenset())",
+    "(random_tensor(OrderedDict(i=bint(2))) + random_tensor(OrderedDict(j=bint(3)))).reduce(ops.add, 'i')",
+    "(random_tensor(OrderedDict(i=bint(2))) * random_tensor(OrderedDict(i=bint(2), j=bint(3)))).reduce(ops.add)",
+]
+
+
+@pytest.mark.parametrize('expr', EXPRS)
+@pytest.mark.parametrize('reinterpret', [recursion_reinterpret, stack_reinterpret])
+def test_reinterpret_reflect(expr, reinterpret):
+    with interpretation(lazy):
+        x = eval(expr)
+    with interpretation(reflect):
+        assert reinterpret(x) is x
+
+
+@pytest.mark.parametrize('expr', EXPRS)
+def test_stack_reinterpret_eager(expr):
+    with interpretation(lazy):
+        x = eval(expr)
+    expected = recursion_reinterpret(x)
+    actual = stack_reinterpret(x)
+    if isinstance(expected, Tensor):
+        assert_close(actual, expected)
+    else:
+        assert actual is expected
+
+
+@pytest.mark.parametrize('x', [
+    (),
+    ("a", 1, 2.),
+    frozenset(["a", "b"]),
+    {"a": Number(1.), "b": (Number(2.),)},
+    OrderedDict([("b", Number(1.)), ("a", Number(2.))]),
+])
+def test_stack_reinterpret_containers(x):
+    actual = stack_reinterpret(x)
+    assert type(actual) is type(x)
+    assert actual == recursion_reinterpret(x)
+
+
+def test_stack_reinterpret_deep():
+    depth = 10000
+    with interpretation(lazy):
+        x = Number(0.)
+        for i in range(depth):
+            x = x + Variable('x', reals())
+    assert x.inputs['x'] == reals()
+    with pytest.raises(RecursionError):
+        recursion_reinterpret(x)
+    actual = stack_reinterpret(x(x=1.))
+    assert actual is Number(float(depth))
+
+
+def test_stack_reinterpret_shared():
+    width = 1000
+    with interpretation(lazy):
+        leaf = Variable('x', reals()) + Number(1.)
+        x = reduce(ops.add, [leaf * Number(float(i)) for i in range(width)])
+
+    calls = []
+
+    def counting_lazy(cls, *args):
+        calls.append(cls.__name__)
+        return lazy(cls, *args)
+
+    with interpretation(counting_lazy):
+        assert stack_reinterpret(x) is x
+    # Each distinct subexpression is visited once, even though leaf is shared:
+    # one Variable, width Numbers, one leaf, width products and width - 1 sums.
+    assert calls.count("Variable") == 1
+    assert len(calls) == 1 + width + 1 + width + (width - 1)
+
+
+def test_dispatch_chain():
+
+    @dispatched_interpretation
+    def first(cls, *args):
+        raise NotImplementedError
+
+    @dispatched_interpretation
+    def second(cls, *args):
+        raise NotImplementedError
+
+    chain = dispatch_chain(first, second)
+    x = Variable('x', reals())
+    y = Number(1.)
+    assert chain(Unary, ops.exp, x) is None
+    assert chain.handlers(Binary, ops.add, x, y) == ()
+
+    @second.register(Binary, ops.AddOp, Funsor, Funsor)
+    def second_binary(op, lhs, rhs):
+        return "second"
+
+    assert chain(Binary, ops.add, x, y) == "second"
+    assert chain(Binary, ops.mul, x, y) is None
+
+    @first.register(Binary, ops.AddOp, Variable, Funsor)
+    def first_binary(op, lhs, rhs):
+        return None if isinstance(rhs, Variable) else "first"
+
+    # Registration invalidates the cached chain.
+    assert chain.handlers(Binary, ops.add, x, y) == (first_binary, second_binary)
+    assert chain(Binary, ops.add, x, y) == "first"
+    assert chain(Binary, ops.add, x, x) == "second"
+    assert chain(Binary, ops.add, y, x) == "second"
+
+
+@pytest.fixture
+def fast_thread_switching():
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(old)
+
+
+def test_interpretation_threads(fast_thread_switching):
+    num_threads = 8
+    num_iters = 200
+    barrier = threading.Barrier(num_threads)
+
+    def worker(i):
+        barrier.wait()
+        interp = lazy if i % 2 else eager
+        x = random_tensor(OrderedDict(i=bint(2)))
+        y = random_tensor(OrderedDict(j=bint(3)))
+        errors = 0
+        for _ in range(num_iters):
+            with interpretation(interp):
+                with monte_carlo_interpretation(particle=bint(i + 1)):
+                    errors += _SAMPLE_INPUTS.get()["particle"].size != i + 1
+                errors += get_interpretation() is not interp
+                z = x + y
+                errors += isinstance(z, Tensor) != (interp is eager)
+            errors += get_interpretation() is not eager
+        return errors
+
+    with ThreadPoolExecutor(num_threads) as executor:
+        errors = list(executor.map(worker, range(num_threads)))
+    assert errors == [0] * num_threads
+    assert get_interpretation() is eager
+
+
+def test_interpretation_coroutines():
+
+    async def worker(interp):
+        results = []
+        for _ in range(10):
+            with interpretation(interp):
+                await asyncio.sleep(0)
+                results.append(get_interpretation() is interp)
+        return all(results)
+
+    async def main():
+        return await asyncio.gather(*(worker(i) for i in [lazy, eager, reflect] * 4))
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert all(loop.run_until_complete(main()))
+    finally:
+        loop.close()
+
+
+def test_gensym_threads(fast_thread_switching):
+    num_threads = 8
+    with ThreadPoolExecutor(num_threads) as executor:
+        names = list(executor.map(lambda _: [gensym() for _ in range(1000)], range(num_threads)))
+    names = sum(names, [])
+    assert len(set(names)) == len(names)
+
+
+def test_monte_carlo_sample_inputs_default(monkeypatch):
+    monkeypatch.setattr(monte_carlo, "sample_inputs", OrderedDict(particle=bint(3)))
+    assert _get_sample_inputs() is monte_carlo.sample_inputs
+    with monte_carlo_interpretation(particle=bint(2)):
+        assert _get_sample_inputs() == OrderedDict(particle=bint(2))
+    assert _get_sample_inputs() is monte_carlo.sample_inputs
+
+
+def test_set_backend_is_global():
+    pytest.importorskip("torch")
+    output = _run_python("""
+import threading
+import funsor
+funsor.set_backend("torch")
+backends = []
+thread = threading.Thread(target=lambda: backends.append(funsor.get_backend()))
+thread.start()
+thread.join()
+print(funsor.get_backend(), *backends)
+""")
+    assert output == ["torch", "torch"]
+
+
+def test_backend_is_context_local():
+    pytest.importorskip("torch")
+    output = _run_python("""
+import threading
+import funsor
+from funsor.util import backend
+backends = []
+def work():
+    with backend("torch"):
+        backends.append(funsor.get_backend())
+    backends.append(funsor.get_backend())
+thread = threading.Thread(target=work)
+thread.start()
+thread.join()
+print(funsor.get_backend(), *backends)
+""")
+    assert output == ["numpy", "torch", "numpy"]
+
+
+def test_backend_rejects_unknown_name():
+    expected = get_backend()
+    with pytest.raises(ValueError):
+        with backend("foo"):
+            pass
+    assert get_backend() == expected
+
+
+def _run_python(code):
+    env = dict(os.environ, FUNSOR_BACKEND="numpy")
+    return subprocess.check_output([sys.executable, "-c", code], env=env, universal_newlines=True).split()
@@ -1,17 +1,20 @@
 # Copyright Contributors to the Pyro project.
 # SPDX-License-Identifier: Apache-2.0
 
+from collections import OrderedDict
+
 import numpy as np
 import pytest
 
 import funsor.ops as ops
 from funsor.cnf import BACKEND_TO_EINSUM_BACKEND, BACKEND_TO_LOGSUMEXP_BACKEND
+from funsor.domains import bint
 from funsor.einsum import einsum, naive_plated_einsum
 from funsor.interpreter import interpretation, reinterpret
-from funsor.memoize import memoize
-from funsor.tensor import numeric_array
+from funsor.memoize import MemoizeCache, memoize
+from funsor.tensor import Tensor, numeric_array
 from funsor.terms import reflect
-from funsor.testing import make_einsum_example, xfail_param
+from funsor.testing import make_einsum_example, random_tensor, xfail_param
 from funsor.util import get_backend
 
 
@@ -161,3 +164,88 @@ def test_nested_complete_sharing_direct():
     with memoize():
         assert reinterpret(c1) is reinterpret(c2)
         assert reinterpret(d1) is reinterpret(d2)
+
+
+@pytest.mark.parametrize('max_size', [None, 1, 2, 100])
+def test_memoize_cache_reuse(max_size):
+    inputs, outputs, sizes, operands, funsor_operands = make_einsum_example("ab,bc,cd->d")
+    with interpretation(reflect):
+        expr = einsum("ab,bc,cd->d", *funsor_operands, backend=BACKEND_TO_EINSUM_BACKEND[get_backend()])
+
+    cache = MemoizeCache(max_size=max_size)
+    with memoize(cache) as c:
+        assert c is cache
+        expected = reinterpret(expr)
+    assert cache.hits == 0
+    misses = cache.misses
+    assert misses > 0
+    if max_size is not None:
+        assert len(cache) <= max_size
+        assert cache.evictions == max(0, misses - max_size)
+
+    # The cache is reused across memoize blocks.
+    with memoize(cache):
+        actual = reinterpret(expr)
+    if max_size is None:
+        assert actual is expected
+        assert cache.hits == misses
+        assert cache.misses == misses
+    assert cache.stats()["size"] == len(cache)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "size": 0, "nbytes": 0}
+
+
+def test_memoize_cache_lru_order():
+    cache = MemoizeCache(max_size=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1  # a is now more recently used than b
+    cache["c"] = 3
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.evictions == 1
+    with pytest.raises(KeyError):
+        cache["b"]
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_memoize_cache_max_bytes():
+    x = random_tensor(OrderedDict(i=bint(100)))
+    nbytes = x.data.element_size() * 100 if get_backend() == "torch" else x.data.nbytes
+    cache = MemoizeCache(max_bytes=int(2.5 * nbytes))
+    with memoize(cache):
+        for i in range(5):
+            x + float(i)
+            assert cache.nbytes <= 2.5 * nbytes
+    assert cache.nbytes == 2 * nbytes
+    assert cache.evictions >= 3
+
+    # Results larger than the budget are never cached.
+    cache = MemoizeCache(max_bytes=nbytes // 2)
+    with memoize(cache):
+        x + 1.
+    assert cache.nbytes == 0
+
+
+def test_memoize_cache_max_bytes_shared_dag():
+    x = random_tensor(OrderedDict(i=bint(100)))
+    with interpretation(reflect):
+        y = x
+        for _ in range(64):
+            y = y + y
+    cache = MemoizeCache(max_bytes=1)
+    cache["y"] = y
+    # Only arrays held directly by the result are counted, not its children.
+    assert cache.nbytes == 0 and "y" in cache
+
+
+def test_memoize_pins_unhashable_args():
+    cache = MemoizeCache()
+    with memoize(cache):
+        for i in range(10):
+            data = numeric_array(np.full(3, float(i)))
+            Tensor(data)
+    # Cached keys keep arrays alive, so ids are never reused by fresh arrays.
+    assert len(cache) == 10
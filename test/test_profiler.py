@@ -0,0 +1,77 @@
+# Copyright Contributors to the Pyro project.
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+from collections import OrderedDict
+
+import funsor.ops as ops
+from funsor.domains import bint, reals
+from funsor.interpreter import interpretation
+from funsor.profiler import Profile, profile
+from funsor.terms import Number, Variable, eager_or_die
+from funsor.testing import assert_close, random_gaussian, random_tensor
+
+
+def test_profile_patterns():
+    x = random_tensor(OrderedDict(i=bint(3)))
+    y = random_tensor(OrderedDict(i=bint(3), j=bint(2)))
+    expected = (x + y).reduce(ops.logaddexp, 'i')
+    with profile() as prof:
+        actual = (x + y).reduce(ops.logaddexp, 'i')
+    assert_close(actual, expected)
+
+    stats = prof.patterns["eager_binary_tensor_tensor"]
+    assert stats.calls == stats.fired == 1
+    assert prof.patterns["Tensor.eager_reduce"].fired == 1
+    for stats in prof.patterns.values():
+        assert stats.fired <= stats.calls
+        assert 0 <= stats.self_time <= stats.total_time
+
+
+def test_profile_methods_and_fallthrough():
+    g = random_gaussian(OrderedDict(i=bint(3), x=reals(2), y=reals()))
+    with profile() as prof:
+        g.reduce(ops.logaddexp, 'x')
+        Variable('z', reals()).exp()
+    assert prof.patterns["Gaussian.eager_reduce"].fired == 1
+    assert prof.fallthrough["eager", "Unary"] == 1
+
+
+def test_profile_eager_or_die_name():
+    with profile() as prof:
+        with interpretation(eager_or_die):
+            Variable('z', reals())(z=Number(1.))
+    assert any(name == "eager_or_die" for name, _ in prof.fallthrough)
+    assert not any(name == "eager" for name, _ in prof.fallthrough)
+
+
+def test_profile_accumulate_and_export():
+    x = random_tensor(OrderedDict(i=bint(3)))
+    prof = Profile()
+    for _ in range(3):
+        with profile(prof):
+            x.exp()
+    with profile(prof):
+        pass
+    assert prof.patterns["Tensor.eager_unary"].calls == 3
+
+    data = json.loads(prof.to_json())
+    assert data["patterns"]["Tensor.eager_unary"]["calls"] == 3
+    assert isinstance(data["fallthrough"], list)
+    table = prof.table(sort_by="calls", limit=5)
+    assert "Tensor.eager_unary" in table
+
+    prof.clear()
+    assert not prof.patterns and not prof.fallthrough
+
+
+def test_profile_nested():
+    x = random_tensor(OrderedDict(i=bint(3)))
+    with profile() as outer:
+        x.exp()
+        with profile() as inner:
+            x.log()
+        x.exp()
+    assert "Tensor.eager_unary" in inner.patterns
+    assert inner.patterns["Tensor.eager_unary"].calls == 1
+    assert outer.patterns["Tensor.eager_unary"].calls == 2
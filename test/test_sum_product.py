@@ -13,7 +13,9 @@ from funsor.domains import bint, reals
 from funsor.interpreter import interpretation
 from funsor.optimizer import apply_optimizer
 from funsor.sum_product import (
+    NUM_SEGMENTS_MEASUREMENTS,
     MarkovProduct,
+    SequentialFilter,
     _partition,
     mixed_sequential_sum_product,
     naive_sarkka_bilmes_product,
@@ -21,10 +23,11 @@ from funsor.sum_product import (
     partial_sum_product,
     sarkka_bilmes_product,
     sequential_sum_product,
+    sequential_sum_product_marginals,
     sum_product
 )
 from funsor.tensor import Tensor, get_default_prototype
-from funsor.terms import Variable, eager_or_die, moment_matching, reflect
+from funsor.terms import Slice, Variable, eager_or_die, moment_matching, reflect
 from funsor.testing import assert_close, random_gaussian, random_tensor
 from funsor.util import get_backend
 
@@ -152,6 +155,83 @@ def test_sequential_sum_product(impl, sum_op, prod_op, batch_inputs, state_domai
     assert_close(actual, expected, rtol=5e-4 * num_steps)
 
 
+@pytest.mark.parametrize('num_steps', [1, 2, 3, 4, 5, 6, 7, 8, 13])
+@pytest.mark.parametrize('sum_op,prod_op,state_domain', [
+    (ops.add, ops.mul, bint(2)),
+    (ops.logaddexp, ops.add, bint(3)),
+    (ops.max, ops.add, bint(3)),
+], ids=str)
+@pytest.mark.parametrize('batch_inputs', [
+    {},
+    {"foo": bint(5)},
+], ids=lambda d: ",".join(d.keys()))
+def test_sequential_sum_product_marginals(sum_op, prod_op, batch_inputs, state_domain, num_steps):
+    inputs = OrderedDict(batch_inputs)
+    inputs.update(time=bint(num_steps), prev=state_domain, curr=state_domain)
+    trans = random_tensor(inputs)
+    time = Variable("time", bint(num_steps))
+
+    actual = sequential_sum_product_marginals(sum_op, prod_op, trans, time, {"prev": "curr"})
+    assert dict(actual.inputs) == dict(trans.inputs)
+
+    # Check against contract.
+    operands = tuple(trans(time=t, prev="t_{}".format(t), curr="t_{}".format(t+1))
+                     for t in range(num_steps))
+    all_vars = frozenset("t_{}".format(t) for t in range(num_steps + 1))
+    for t in range(num_steps):
+        keep = frozenset(["t_{}".format(t), "t_{}".format(t+1)])
+        with interpretation(reflect):
+            expected = sum_product(sum_op, prod_op, operands, all_vars - keep)
+        expected = apply_optimizer(expected)
+        expected = expected(**{"t_{}".format(t): "prev", "t_{}".format(t+1): "curr"})
+        actual_t = actual(time=t)
+        expected = expected.align(tuple(actual_t.inputs.keys()))
+        assert_close(actual_t, expected, rtol=5e-4 * num_steps)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3])
+@pytest.mark.parametrize('sum_op,prod_op,state_domain', [
+    (ops.add, ops.mul, bint(2)),
+    (ops.logaddexp, ops.add, bint(3)),
+    (ops.logaddexp, ops.add, reals()),
+], ids=str)
+@pytest.mark.parametrize('batch_inputs', [
+    {},
+    {"foo": bint(2)},
+], ids=lambda d: ",".join(d.keys()))
+def test_sequential_filter(sum_op, prod_op, state_domain, batch_inputs, chunk_size):
+    num_steps = 7
+    inputs = OrderedDict(batch_inputs)
+    inputs.update(time=bint(num_steps), prev=state_domain, curr=state_domain)
+    if state_domain.dtype == "real":
+        trans = random_gaussian(inputs)
+    else:
+        trans = random_tensor(inputs)
+
+    f = SequentialFilter(sum_op, prod_op, {"prev": "curr"})
+    assert f.message is None
+    start = 0
+    while start < num_steps:
+        stop = min(start + chunk_size, num_steps)
+        if chunk_size == 1:
+            f.update(trans(time=start))
+        else:
+            f.update(trans(time=Slice("time", start, stop, 1, num_steps)), time="time")
+        checkpoint = f.checkpoint()
+        assert f.num_steps == stop
+
+        expected = sequential_sum_product(sum_op, prod_op, trans(time=Slice("time", 0, stop, 1, num_steps)),
+                                          Variable("time", bint(stop)), {"prev": "curr"})
+        assert dict(f.message.inputs) == dict(expected.inputs)
+        assert_close(f.message, expected.align(tuple(f.message.inputs)), rtol=5e-4 * num_steps)
+
+        # An update can be undone by restoring a checkpoint.
+        f.update(trans(time=0))
+        f.restore(checkpoint)
+        assert f.message is checkpoint[0]
+        start = stop
+
+
 @pytest.mark.parametrize('num_steps', [None] + list(range(1, 6)))
 @pytest.mark.parametrize('batch_inputs', [
     {},
@@ -452,7 +532,7 @@ def test_sarkka_bilmes_example_6(duration):
     (("a", reals(2)), ("b", reals(2)), ("Pb", reals(2))),
     (("a", reals(2)), ("b", reals(2)), ("PPb", reals(2))),
 ])
-@pytest.mark.parametrize("num_periods", [1, 2])
+@pytest.mark.parametrize("num_periods", [1, 2, "auto"])
 def test_sarkka_bilmes_generic(time_input, global_inputs, local_inputs, num_periods):
 
     lags = {
@@ -504,3 +584,29 @@ def test_mixed_sequential_sum_product(duration, num_segments):
                                           num_segments=num_segments)
 
     assert_close(actual, expected)
+
+
+@pytest.mark.parametrize("duration", [1, 5, 12])
+def test_mixed_sequential_sum_product_auto(duration):
+
+    sum_op, prod_op = ops.logaddexp, ops.add
+    time_var = Variable("time", bint(duration))
+    step = {"Px": "x"}
+    trans = random_tensor(OrderedDict([("time", bint(duration)), ("Px", bint(3)), ("x", bint(3))]))
+    expected = sequential_sum_product(sum_op, prod_op, trans, time_var, step)
+
+    NUM_SEGMENTS_MEASUREMENTS.clear()
+    actual = mixed_sequential_sum_product(sum_op, prod_op, trans, time_var, step, num_segments="auto")
+    assert_close(actual, expected)
+    assert len(NUM_SEGMENTS_MEASUREMENTS) == 1
+    key, = NUM_SEGMENTS_MEASUREMENTS
+    assert key[:3] == (get_backend(), type(trans), trans.data.dtype)
+    measurements, = NUM_SEGMENTS_MEASUREMENTS.values()
+    assert 1 in measurements and duration in measurements
+    assert all(0 < n <= duration for n in measurements)
+
+    # A second call with the same signature reuses the measurements.
+    actual = mixed_sequential_sum_product(sum_op, prod_op, trans, time_var, step, num_segments="auto")
+    assert_close(actual, expected)
+    assert list(NUM_SEGMENTS_MEASUREMENTS.values()) == [measurements]
+    assert next(iter(NUM_SEGMENTS_MEASUREMENTS.values())) is measurements
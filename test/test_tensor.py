@@ -12,9 +12,10 @@ import funsor.ops as ops
 from funsor.domains import Domain, bint, find_domain, reals
 from funsor.interpreter import interpretation
 from funsor.terms import Cat, Lambda, Number, Slice, Stack, Variable, lazy
-from funsor.testing import (assert_close, assert_equiv, check_funsor, empty,
+from funsor.testing import (assert_close, assert_equiv, check_funsor, empty, id_from_inputs,
                             rand, randn, random_tensor, zeros)
-from funsor.tensor import REDUCE_OP_TO_NUMERIC, Einsum, Tensor, align_tensors, numeric_array, stack, tensordot
+from funsor.tensor import (REDUCE_OP_TO_NUMERIC, Einsum, Tensor, _numpy_categorical_sample, align_tensors,
+                           numeric_array, stack, tensordot)
 from funsor.util import get_backend
 
 
@@ -229,6 +230,27 @@ def test_advanced_indexing_tensor(output_shape):
     assert_equiv(expected, x(k=k)(j=j)(i=i))
 
 
+@pytest.mark.parametrize('output_shape', [(), (7,)])
+def test_advanced_indexing_shared_batch(output_shape):
+    # i and k are not adjacent, and their indices share the batch input b.
+    x = random_tensor(OrderedDict([
+        ('i', bint(2)),
+        ('b', bint(3)),
+        ('j', bint(4)),
+        ('k', bint(5)),
+    ]), reals(*output_shape))
+    i = random_tensor(OrderedDict([('b', bint(3))]), bint(2))
+    k = random_tensor(OrderedDict([('u', bint(6)), ('b', bint(3))]), bint(5))
+
+    actual = x(i=i, j=1, k=k)
+    assert list(actual.inputs) == ['b', 'u']
+    expected_data = empty((3, 6) + output_shape)
+    for b in range(3):
+        for u in range(6):
+            expected_data[b, u] = x.data[i.data[b], b, 1, k.data[u, b]]
+    assert_close(actual.data, expected_data)
+
+
 @pytest.mark.parametrize('output_shape', [(), (7,), (3, 2)])
 def test_advanced_indexing_lazy(output_shape):
     x = Tensor(randn((2, 3, 4) + output_shape), OrderedDict([
@@ -343,6 +365,25 @@ def test_binary_funsor_funsor(symbol, dims1, dims2):
     check_funsor(actual, inputs, Domain((), dtype), expected_data)
 
 
+@pytest.mark.parametrize('expand', [False, True])
+@pytest.mark.parametrize('output_shape', [(), (2,)], ids=str)
+def test_align_tensors_expand(output_shape, expand):
+    x = random_tensor(OrderedDict([('b', bint(4)), ('a', bint(3))]), reals(*output_shape))
+    y = random_tensor(OrderedDict([('c', bint(5)), ('a', bint(3))]))
+    for _ in range(2):  # the second call reuses a cached alignment plan
+        inputs, (x_data, y_data) = align_tensors(x, y, expand=expand)
+        assert list(inputs) == ['b', 'a', 'c']
+        if expand:
+            assert x_data.shape == (4, 3, 5) + output_shape
+            assert y_data.shape == (4, 3, 5)
+        else:
+            assert x_data.shape == (4, 3, 1) + output_shape
+            assert y_data.shape == (1, 3, 5)
+        for a, b, c in itertools.product(range(3), range(4), range(5)):
+            assert_close(x_data[b, a, c if expand else 0], x.data[b, a])
+            assert_close(y_data[b if expand else 0, a, c], y.data[c, a])
+
+
 @pytest.mark.parametrize('output_shape2', [(), (2,), (3, 2)], ids=str)
 @pytest.mark.parametrize('output_shape1', [(), (2,), (3, 2)], ids=str)
 @pytest.mark.parametrize('inputs2', [(), ('a',), ('b', 'a'), ('b', 'c', 'a')], ids=str)
@@ -600,6 +641,23 @@ def test_reduce_subset(dims, reduced_vars, op):
                      atol=1e-5, rtol=1e-5)
 
 
+@pytest.mark.parametrize('dims', [(0, 1), (0, 2), (1, 2, 3)])
+@pytest.mark.parametrize('op', REDUCE_OPS, ids=str)
+def test_reduce_numeric_multi_axis(dims, op):
+    data = rand((2, 3, 4, 5)) + 0.5
+    if op in [ops.and_, ops.or_]:
+        data = ops.astype(data, 'uint8')
+    elif op in [ops.logaddexp, ops.sample]:
+        # Check numerical stability when all entries of a slice are -inf.
+        data = ops.log(data) - numeric_array([[[[float('inf')]]], [[[0.]]]])
+    numeric_op = REDUCE_OP_TO_NUMERIC[op]
+    expected = data
+    for dim in reversed(dims):
+        expected = numeric_op(expected, dim)
+    actual = numeric_op(data, dims)
+    assert_close(actual, expected, atol=1e-5, rtol=1e-5)
+
+
 @pytest.mark.parametrize('dims', [(), ('a',), ('a', 'b'), ('b', 'a', 'c')])
 @pytest.mark.parametrize('event_shape', [(), (4,), (2, 3)])
 @pytest.mark.parametrize('op', REDUCE_OPS, ids=str)
@@ -941,3 +999,41 @@ def test_tensor_to_funsor_ambiguous_output():
     f2 = funsor.to_funsor(x, output=reals(), dim_to_name=OrderedDict({-2: 'a'}))
     assert f.inputs == f2.inputs == OrderedDict(a=bint(2))
     assert f.output.shape == () == f2.output.shape
+
+
+@pytest.mark.skipif(get_backend() != "numpy", reason="numpy-specific rng")
+@pytest.mark.parametrize('batch_inputs', [
+    (),
+    (('b', bint(3)),),
+    (('b', bint(3)), ('c', bint(4))),
+], ids=id_from_inputs)
+def test_tensor_sample_numpy_generator(batch_inputs):
+    num_samples = 50000
+    sample_inputs = OrderedDict(n=bint(num_samples))
+    be_inputs = OrderedDict(batch_inputs + (('e', bint(5)),))
+    p = random_tensor(be_inputs)
+    # include a zero-probability category
+    p = Tensor(np.where(np.arange(5) == 2, -np.inf, p.data), be_inputs)
+
+    mqs = []
+    for _ in range(2):
+        q = p.sample(frozenset('e'), sample_inputs, rng_key=np.random.default_rng(0))
+        mqs.append(p.materialize(q).reduce(ops.logaddexp, 'n').align(tuple(be_inputs)))
+    assert_close(mqs[0], mqs[1])
+    assert_close(ops.exp(mqs[0].data), ops.exp(p.data), atol=0.1, rtol=0.05)
+
+
+class _LastRandomState(np.random.RandomState):
+    def random(self, size=None):
+        return np.full(size, np.nextafter(1., 0.))
+
+
+@pytest.mark.skipif(get_backend() != "numpy", reason="numpy-specific rng")
+def test_tensor_sample_numpy_rounding():
+    # The largest uniform draw must not select a trailing zero-probability
+    # category, even where adding the batch offset rounds it up.
+    logits = np.random.randn(2 ** 16, 3)
+    logits[:, -1] = -np.inf
+    sample = _numpy_categorical_sample(logits, (), _LastRandomState(0))
+    assert sample.shape == (2 ** 16,)
+    assert ((sample == 0) | (sample == 1)).all()
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import itertools
+import pickle
 import typing
 from collections import OrderedDict
 from functools import reduce
@@ -14,7 +15,7 @@ import funsor.ops as ops
 from funsor.cnf import Contraction
 from funsor.domains import Domain, bint, reals
 from funsor.interpreter import interpretation, reinterpret
-from funsor.tensor import REDUCE_OP_TO_NUMERIC
+from funsor.tensor import REDUCE_OP_TO_NUMERIC, Tensor
 from funsor.terms import (
     Binary,
     Cat,
@@ -33,6 +34,7 @@ from funsor.terms import (
     normalize,
     reflect,
     sequential,
+    substitute,
     to_data,
     to_funsor
 )
@@ -166,6 +168,46 @@ def test_variable(domain):
     assert xp1(x=2.) == 3.
 
 
+def test_inputs_are_interned_and_immutable():
+    x = Variable('x', bint(3))
+    y = Variable('y', reals())
+    f = x + y
+    g = (x * y).exp()
+    assert f.inputs is g.inputs
+    assert f.inputs == OrderedDict([('x', bint(3)), ('y', reals())])
+    assert hash(f.inputs) == hash(g.inputs)
+    with pytest.raises(TypeError):
+        f.inputs['z'] = reals()
+    inputs = f.inputs.copy()
+    inputs['z'] = reals()
+    assert 'z' not in f.inputs
+
+
+def test_binary_shares_inputs():
+    x = Variable('x', bint(3))
+    y = Variable('y', reals())
+    with interpretation(lazy):
+        f = x + y
+        assert (f * x).inputs is f.inputs
+        assert (Number(2.) * f).inputs is f.inputs
+        assert pickle.loads(pickle.dumps(f.inputs)) is f.inputs
+
+
+@pytest.mark.parametrize('expr', [
+    "Variable('x', reals())",
+    "Number(1.)",
+    "Variable('x', reals()) + 1.",
+    "Variable('x', reals()).exp()",
+    "Reduce(ops.add, Variable('i', bint(2)) + Variable('x', reals()), frozenset(['i']))",
+    "Subs(Variable('x', reals()) * 2, (('x', Variable('y', reals())),))",
+    "random_tensor(OrderedDict(i=bint(2)))",
+])
+def test_core_terms_are_slotted(expr):
+    with interpretation(lazy):
+        x = eval(expr)
+    assert not hasattr(x, '__dict__')
+
+
 def test_substitute():
     x = Variable('x', reals())
     y = Variable('y', reals())
@@ -181,6 +223,51 @@ def test_substitute():
     assert f(x=y, y=z, z=x) is y * z + y * x
 
 
+@pytest.mark.parametrize('use_tco', [False, True])
+def test_substitute_prunes_unaffected_subtrees(monkeypatch, use_tco):
+    monkeypatch.setattr(funsor.interpreter, "_USE_TCO", use_tco)
+    if not use_tco:
+        monkeypatch.setattr(funsor.interpreter, "stack_reinterpret", None)
+    x = Variable('x', reals())
+    y = Variable('y', reals())
+    with interpretation(lazy):
+        g = reduce(ops.add, [(y * i).exp() for i in range(1, 20)])
+        g = Contraction(ops.add, ops.mul, frozenset(['i']), g, random_tensor(OrderedDict(i=bint(3))))
+        f = x * y + g
+    assert isinstance(g, Contraction)
+
+    calls = []
+    lazy_dispatch = funsor.terms._lazy_dispatch
+
+    def counting_dispatch(cls, *args):
+        calls.append(cls)
+        return lazy_dispatch(cls, *args)
+
+    monkeypatch.setattr(funsor.terms, "_lazy_dispatch", counting_dispatch)
+    with interpretation(lazy):
+        actual = substitute(f, {'x': Number(2.)})
+    assert actual.rhs is g
+    assert Contraction not in calls and len(calls) < 10
+
+    with interpretation(lazy):
+        assert substitute(f, {'z': Number(2.)}) is f
+
+
+@pytest.mark.parametrize('use_tco', [False, True])
+def test_substitute_reinterprets_unaffected_subtrees_eagerly(monkeypatch, use_tco):
+    monkeypatch.setattr(funsor.interpreter, "_USE_TCO", use_tco)
+    x = random_tensor(OrderedDict(i=bint(2)))
+    y = Variable('y', reals())
+    with interpretation(lazy):
+        f = x.exp() * 2 + y
+    assert not isinstance(f, Tensor)
+
+    value = random_tensor(OrderedDict(i=bint(2)))
+    actual = substitute(f, {'y': value})
+    assert isinstance(actual, Tensor)
+    assert_close(actual, x.exp() * 2 + value)
+
+
 def unary_eval(symbol, x):
     if symbol in ['~', '-']:
         return eval('{} x'.format(symbol))
@@ -510,6 +597,24 @@ def test_not_parametric_subclass(subcls_expr, cls_expr):
     assert not issubclass(subcls, cls)
 
 
+@pytest.mark.parametrize("expr,expected_type", [
+    ("Number(0.)", "Number[float, str]"),
+    ("Variable('x', reals()) + Number(1.)", "Binary[ops.AddOp, Variable[str, Domain], Number[float, str]]"),
+    ("Stack('i', (Number(0.), Number(1.)))", "Stack[str, typing.Tuple[Number[float, str], Number[float, str]]]"),
+    ("Stack('i', (Number(0.), Variable('x', reals())))",
+     "Stack[str, typing.Tuple[Number[float, str], Variable[str, Domain]]]"),
+    ("Subs(Variable('x', reals()), (('x', Variable('y', reals())),))",
+     "Subs[Variable[str, Domain], typing.Tuple]"),
+    ("Lambda(Variable('i', bint(2)), Variable('x', reals()))", "Lambda[Variable[str, Domain], Variable[str, Domain]]"),
+])
+def test_reflect_parametric_type(expr, expected_type):
+    with interpretation(reflect):
+        x = eval(expr)
+        expected = eval(expected_type)
+        assert type(x) is expected
+        assert type(reinterpret(x)) is expected
+
+
 @pytest.mark.parametrize("start,stop", [
     (1, 3), (0, 1), (3, 7), (4, 8), (0, 2), (0, 10), (1, 2), (1, 10), (2, 10)])
 @pytest.mark.parametrize("step", [1, 2, 3, 5, 10])